@@ -4,10 +4,28 @@ ClickHouse connection pool implementation
 This module provides thread-safe connection management for ClickHouse
 """
 
-import queue
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from clickhouse_driver import Client
+from clickhouse_driver.errors import Error as ClickHouseError
+
+# Failures that mean "this connection is unusable": driver/server errors plus raw socket errors
+CONNECTION_ERRORS = (ClickHouseError, OSError, EOFError)
+
+# Per-query override for the SELECT 1 probe, so it doesn't inherit the bulk-insert max_threads
+HEALTH_CHECK_SETTINGS = {'max_threads': 1, 'max_execution_time': 5}
+
+
+class _Waiter:
+    """One-slot mailbox for a thread blocked in get_connection"""
+    __slots__ = ('event', 'connection')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.connection = None
 
 
 class ClickHouseConnectionPool:
@@ -19,7 +37,8 @@ class ClickHouseConnectionPool:
     """
     
     def __init__(self, host='localhost', port=9000, database='default', 
-                user='default', password='', max_connections=10, **kwargs):
+                user='default', password='', max_connections=10, compression=False,
+                tcp_keepalive=(30, 10, 3), **kwargs):
         """
         Initialize the connection pool with customizable settings
         
@@ -30,6 +49,10 @@ class ClickHouseConnectionPool:
         - user: Username for authentication
         - password: Password for authentication
         - max_connections: Maximum number of connections to create
+        - compression: Native-protocol block compression (False, True/'lz4', 'lz4hc' or 'zstd');
+          needs the optional lz4/zstd and clickhouse-cityhash packages
+        - tcp_keepalive: (idle, interval, probes) in seconds/count, so NAT/firewalls don't silently
+          drop idle pooled sockets; True for OS defaults, False to disable
         - **kwargs: Additional parameters to override default connection settings
         """
         self.host = host
@@ -38,11 +61,17 @@ class ClickHouseConnectionPool:
         self.user = user
         self.password = password
         self.max_connections = max_connections
+        self.compression = compression
+        self.tcp_keepalive = tcp_keepalive
         
         # Connection pool and management
-        self.pool = queue.Queue(maxsize=max_connections)
+        # Idle connections form a LIFO stack: deque append/pop are atomic in CPython, so the
+        # fast path takes no lock, and the most recently used (still warm) socket goes out first
+        self.pool = deque()
         self.active_connections = 0
         self.lock = threading.Lock()
+        # Threads blocked on an exhausted pool, oldest first; returned connections go to them directly
+        self._waiters = deque()
         
         # Default settings for connections
         self.connection_settings = {
@@ -68,8 +97,17 @@ class ClickHouseConnectionPool:
         # Pre-fill the pool with some connections
         self._fill_pool(min(3, max_connections))
     
-    def _create_connection(self):
-        """Create a new ClickHouse connection"""
+    def _create_connection(self, verify=False):
+        """
+        Create a new ClickHouse connection
+        
+        clickhouse_driver connects lazily on the first execute, so the client is
+        only probed with SELECT 1 when verify is set (pool pre-fill). Checkouts on
+        the hot path skip that extra round-trip.
+        
+        Parameters:
+        - verify: Run a SELECT 1 before handing out the connection
+        """
         try:
             client = Client(
                 host=self.host,
@@ -77,30 +115,42 @@ class ClickHouseConnectionPool:
                 database=self.database,
                 user=self.user,
                 password=self.password,
+                compression=self.compression,
+                tcp_keepalive=self.tcp_keepalive,
                 settings=self.connection_settings
             )
+            if not verify:
+                return client
+            
             # Test the connection
-            result = client.execute("SELECT 1")
+            result = client.execute("SELECT 1", settings=HEALTH_CHECK_SETTINGS)
             if result and result[0][0] == 1:
                 return client
             else:
-                raise Exception("Connection test failed")
-        except Exception as e:
+                raise ConnectionError("Connection test failed")
+        except CONNECTION_ERRORS as e:
             print(f"Error creating connection: {e}")
             raise
     
     def _fill_pool(self, num_connections):
-        """Fill the pool with connections"""
-        for _ in range(num_connections):
-            try:
-                with self.lock:
-                    if self.active_connections < self.max_connections:
-                        connection = self._create_connection()
-                        self.pool.put(connection)
-                        self.active_connections += 1
-            except Exception as e:
-                print(f"Error filling pool: {e}")
-                break
+        """Fill the pool with connections, opening them concurrently"""
+        # Reserve the slots up front so the lock is never held across a network round-trip
+        with self.lock:
+            num_connections = min(num_connections, self.max_connections - self.active_connections)
+            if num_connections <= 0:
+                return
+            self.active_connections += num_connections
+        
+        with ThreadPoolExecutor(max_workers=num_connections) as executor:
+            futures = [executor.submit(self._create_connection, True) for _ in range(num_connections)]
+            for future in as_completed(futures):
+                try:
+                    self.return_connection(future.result())
+                except CONNECTION_ERRORS as e:
+                    print(f"Error filling pool: {e}")
+                    # Give back the slot reserved for this connection
+                    with self.lock:
+                        self.active_connections -= 1
     
     def get_connection(self, timeout=10):
         """
@@ -117,27 +167,48 @@ class ClickHouseConnectionPool:
         - A ClickHouse client connection
         """
         try:
-            # Try to get a connection from the pool first
-            return self.pool.get(block=False)
-        except queue.Empty:
-            # If the pool is empty but not at capacity, create a new connection
+            # Try to get the most recently returned connection first (lock-free)
+            return self.pool.pop()
+        except IndexError:
+            pass
+        
+        # If the pool is empty but not at capacity, create a new connection
+        with self.lock:
+            if self.active_connections < self.max_connections:
+                try:
+                    connection = self._create_connection()
+                    self.active_connections += 1
+                    return connection
+                except CONNECTION_ERRORS as e:
+                    print(f"Error creating new connection: {e}")
+                    # Fall back to waiting for a connection from the pool
+                    pass
+        
+        # Wait (in FIFO order) for a connection to be handed over
+        print("Connection pool exhausted, waiting for an available connection...")
+        waiter = _Waiter()
+        with self.lock:
+            self._waiters.append(waiter)
+            # A connection may have been returned since the pop above
+            self._hand_off_idle()
+        
+        if not waiter.event.wait(timeout):
             with self.lock:
-                if self.active_connections < self.max_connections:
-                    try:
-                        connection = self._create_connection()
-                        self.active_connections += 1
-                        return connection
-                    except Exception as e:
-                        print(f"Error creating new connection: {e}")
-                        # Fall back to waiting for a connection from the pool
-                        pass
-            
-            # Wait for a connection to become available
+                if waiter.connection is None:
+                    self._waiters.remove(waiter)
+                    raise TimeoutError("Timed out waiting for a connection")
+        return waiter.connection
+    
+    def _hand_off_idle(self):
+        """Move idle connections to waiting threads (caller holds self.lock)"""
+        while self._waiters and self.pool:
             try:
-                print("Connection pool exhausted, waiting for an available connection...")
-                return self.pool.get(timeout=timeout)
-            except queue.Empty:
-                raise Exception("Timed out waiting for a connection")
+                connection = self.pool.pop()
+            except IndexError:
+                break  # Taken by a lock-free get_connection
+            waiter = self._waiters.popleft()
+            waiter.connection = connection
+            waiter.event.set()
     
     def return_connection(self, connection):
         """
@@ -149,26 +220,67 @@ class ClickHouseConnectionPool:
         if connection is None:
             return
             
-        # Check if connection is still valid
-        try:
-            # Test connection with a simple query
-            result = connection.execute("SELECT 1")
-            if result and result[0][0] == 1:
-                # Connection is still good, return it to the pool
-                self.pool.put(connection, block=False)
-            else:
-                # Connection is not valid, close it and decrease count
-                self._close_connection(connection)
-        except Exception as e:
-            # Connection is not valid, close it and decrease count
-            print(f"Connection error, removing from pool: {e}")
+        # No SELECT 1 here: clickhouse_driver pings/reconnects a stale socket itself
+        # before the next query, and drops the socket on any query error
+        # Hand the connection straight to the longest-waiting thread, so the
+        # returning thread cannot immediately grab it back and starve waiters
+        if self._waiters:
+            with self.lock:
+                if self._waiters:
+                    waiter = self._waiters.popleft()
+                    waiter.connection = connection
+                    waiter.event.set()
+                    return
+        
+        if len(self.pool) >= self.max_connections:
+            # More connections returned than the pool holds, close the extra one
             self._close_connection(connection)
+            return
+        
+        self.pool.append(connection)
+        # Only touch the lock when someone is actually blocked in get_connection
+        if self._waiters:
+            with self.lock:
+                self._hand_off_idle()
+    
+    def insert_stream(self, table, columns, rows, block_size=100000, types_check=False):
+        """
+        Insert rows from any iterable in large native-protocol blocks on one pooled connection
+        
+        Each execute sends one block, and ClickHouse writes one part per insert, so big
+        blocks keep MergeTree merge pressure low. rows is consumed lazily, so a generator
+        never has to be materialized in full.
+        
+        Parameters:
+        - table: Target table name
+        - columns: Column names, in the same order as the values in each row
+        - rows: Iterable of row tuples/lists
+        - block_size: Rows per INSERT block
+        - types_check: Validate every value against the column type before sending;
+          leave off for rows that were already converted by the caller
+        
+        Returns:
+        - Number of rows inserted
+        """
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES"
+        rows = iter(rows)
+        inserted = 0
+        
+        with ConnectionManager(self) as client:
+            while True:
+                block = list(islice(rows, block_size))
+                if not block:
+                    break
+                client.execute(query, block, types_check=types_check)
+                inserted += len(block)
+        
+        return inserted
     
     def _close_connection(self, connection):
         """Close a connection and decrease the active count"""
         try:
             connection.disconnect()
-        except Exception:
+        except CONNECTION_ERRORS:
             pass
         finally:
             with self.lock:
@@ -178,9 +290,9 @@ class ClickHouseConnectionPool:
         """Close all connections in the pool"""
         while True:
             try:
-                connection = self.pool.get(block=False)
+                connection = self.pool.pop()
                 self._close_connection(connection)
-            except queue.Empty:
+            except IndexError:
                 break
         
         with self.lock:
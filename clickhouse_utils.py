@@ -10,6 +10,7 @@ import time
 from datetime import datetime
 import sys
 import os
+from operator import itemgetter
 
 # Import the connection pool
 from clickhouse_pool import ClickHouseConnectionPool, ConnectionManager
@@ -351,25 +352,33 @@ def _safe_uint_convert(value, field_name="field", clamp_to_uint8=False):
         return 0
 
 
+# Landing table column order, resolved once so batches can be sent as plain tuples
+LANDING_COLUMNS = (
+    'wld_id', 'record_type', 'test_num', 'head_num', 'site_num',
+    'wptm_created_date', 'record_data', 'test_flag', 'alarm_id', 'part_txt', 'segment', 'file_hash'
+)
+LANDING_INSERT_QUERY = f"INSERT INTO measurements_landing ({', '.join(LANDING_COLUMNS)}) VALUES"
+
+
 def _prepare_landing_batch_data(batch_records):
-    """Prepare batch data for ClickHouse insertion with safe type conversion."""
+    """Prepare batch data (tuples in LANDING_COLUMNS order) with safe type conversion."""
     batch_data = []
     for record in batch_records:
         # Use UInt64 range (0-18446744073709551615) for head_num and site_num
-        batch_data.append({
-            'wld_id': record['wld_id'],
-            'record_type': record['record_type'],
-            'test_num': record['test_num'],
-            'head_num': _safe_uint_convert(record['head_num'], 'head_num', clamp_to_uint8=False),
-            'site_num': _safe_uint_convert(record['site_num'], 'site_num', clamp_to_uint8=False),
-            'wptm_created_date': record['wptm_created_date'],
-            'record_data': record['record_data'],
-            'test_flag': record['test_flag'],
-            'alarm_id': record['alarm_id'],
-            'part_txt': record['part_txt'],
-            'segment': record.get('segment', 0),
-            'file_hash': record.get('file_hash', '')
-        })
+        batch_data.append((
+            record['wld_id'],
+            record['record_type'],
+            record['test_num'],
+            _safe_uint_convert(record['head_num'], 'head_num', clamp_to_uint8=False),
+            _safe_uint_convert(record['site_num'], 'site_num', clamp_to_uint8=False),
+            record['wptm_created_date'],
+            record['record_data'],
+            record['test_flag'],
+            record['alarm_id'],
+            record['part_txt'],
+            record.get('segment', 0),
+            record.get('file_hash', '')
+        ))
     return batch_data
 
 
@@ -379,13 +388,7 @@ def _execute_landing_batch_with_retry(connection_pool, batch_data, max_retries=3
     while retry_count < max_retries:
         try:
             with ConnectionManager(connection_pool) as client:
-                client.execute(
-                    """INSERT INTO measurements_landing 
-                       (wld_id, record_type, test_num, head_num, site_num, 
-                        wptm_created_date, record_data, test_flag, alarm_id, part_txt, segment, file_hash) 
-                       VALUES""",
-                    batch_data
-                )
+                client.execute(LANDING_INSERT_QUERY, batch_data, types_check=False)
             return True
         except Exception as e:
             retry_count += 1
@@ -539,10 +542,21 @@ def _collect_device_info_map(extractor):
     return device_info_map
 
 
+# Column order of the device_info INSERT below (keys of the _collect_device_info_map dicts)
+DEVICE_INFO_COLUMNS = (
+    'wld_id', 'wld_device_dmc', 'wld_phoenix_id', 'wld_latest',
+    'wld_bin_code', 'wld_bin_desc', 'wfi_facility', 'wfi_operation',
+    'wl_lot_name', 'wmp_prog_name', 'wmp_prog_version', 'wfi_equipment',
+    'sft_name', 'sft_group', 'wld_created_date'
+)
+
+
 def _push_device_info(client, device_info_map, batch_size):
     """Push device info to ClickHouse."""
     device_info_start = time.time()
-    device_info_data = list(device_info_map.values())
+    # Pull each row out with one C-level itemgetter call instead of letting the driver look up dict keys per column
+    get_row = itemgetter(*DEVICE_INFO_COLUMNS)
+    device_info_data = [get_row(info) for info in device_info_map.values()]
     print(f"Pushing {len(device_info_data)} device info records...")
     
     for i in range(0, len(device_info_data), batch_size):
@@ -570,7 +584,7 @@ def _push_parameter_info(client, extractor, batch_size):
     print("Pushing parameter info...")
     
     param_data = [
-        {'wtp_id': param_id, 'wtp_param_name': param_name}
+        (param_id, param_name)
         for param_name, param_id in extractor.param_id_map.items()
     ]
     
@@ -585,6 +599,30 @@ def _push_parameter_info(client, extractor, batch_size):
     print(f"Pushed {len(extractor.param_id_map)} parameter info records in {time.time() - param_start:.2f} seconds")
 
 
+def _push_with_pooled_connection(pool, push_func, *args):
+    """Run a push helper on its own connection from the pool."""
+    with ConnectionManager(pool) as client:
+        return push_func(client, *args)
+
+
+def _push_reference_tables(pool, extractor, device_info_map, batch_size):
+    """Push device mappings, device info and parameter info concurrently (independent tables, one connection each)."""
+    jobs = [
+        (_push_device_mappings, extractor),
+        (_push_device_info, device_info_map),
+        (_push_parameter_info, extractor)
+    ]
+    
+    with ThreadPoolExecutor(max_workers=min(len(jobs), pool.max_connections)) as executor:
+        futures = [
+            executor.submit(_push_with_pooled_connection, pool, push_func, data, batch_size)
+            for push_func, data in jobs
+        ]
+        # Re-raise the first failure, same as the previous sequential pushes
+        for future in futures:
+            future.result()
+
+
 def _push_landing_records_if_available(connection_params, extractor, batch_size):
     """Push landing table records if available."""
     # Handle both original extractor.data_store and C++ version (dict with landing_records key)
@@ -631,12 +669,10 @@ def push_to_clickhouse(extractor, host='localhost', port=9000, database='default
         
         with ConnectionManager(setup_pool) as client:
             _setup_schema_and_optimize(client, extractor)
-            _push_device_mappings(client, extractor, batch_size)
-            
-            print("Collecting device info data...")
-            device_info_map = _collect_device_info_map(extractor)
-            _push_device_info(client, device_info_map, batch_size)
-            _push_parameter_info(client, extractor, batch_size)
+        
+        print("Collecting device info data...")
+        device_info_map = _collect_device_info_map(extractor)
+        _push_reference_tables(setup_pool, extractor, device_info_map, batch_size)
         
         setup_pool.close_all()
         
@@ -724,19 +760,27 @@ def _get_duplicate_segment(duplicate_key, duplicate_tracker, duplicate_lock):
     return segment
 
 
+# Measurements table column order, resolved once so batches can be sent as plain tuples
+MEASUREMENT_COLUMNS = (
+    'wld_id', 'wtp_id', 'wp_pos_x', 'wp_pos_y', 'wptm_value',
+    'wptm_created_date', 'test_flag', 'segment', 'file_hash'
+)
+MEASUREMENT_INSERT_QUERY = f"INSERT INTO measurements ({', '.join(MEASUREMENT_COLUMNS)}) VALUES"
+
+
 def _convert_measurement_to_batch_data(measurement, segment):
-    """Convert measurement record to batch data format."""
-    return {
-        'wld_id': measurement['WLD_ID'],
-        'wtp_id': measurement['WTP_ID'],
-        'wp_pos_x': int(measurement['WP_POS_X']),
-        'wp_pos_y': int(measurement['WP_POS_Y']),
-        'wptm_value': float(measurement['WPTM_VALUE']),
-        'wptm_created_date': measurement['WPTM_CREATED_DATE'],
-        'test_flag': 1 if measurement['TEST_FLAG'] else 0,
-        'segment': segment,
-        'file_hash': measurement.get('FILE_HASH', '')
-    }
+    """Convert measurement record to a batch row (tuple in MEASUREMENT_COLUMNS order)."""
+    return (
+        measurement['WLD_ID'],
+        measurement['WTP_ID'],
+        int(measurement['WP_POS_X']),
+        int(measurement['WP_POS_Y']),
+        float(measurement['WPTM_VALUE']),
+        measurement['WPTM_CREATED_DATE'],
+        1 if measurement['TEST_FLAG'] else 0,
+        segment,
+        measurement.get('FILE_HASH', '')
+    )
 
 
 def _execute_batch_with_retry(connection_pool, batch_data, max_retries=3):
@@ -745,10 +789,7 @@ def _execute_batch_with_retry(connection_pool, batch_data, max_retries=3):
     while retry_count < max_retries:
         try:
             with ConnectionManager(connection_pool) as client:
-                client.execute(
-                    "INSERT INTO measurements (wld_id, wtp_id, wp_pos_x, wp_pos_y, wptm_value, wptm_created_date, test_flag, segment, file_hash) VALUES",
-                    batch_data
-                )
+                client.execute(MEASUREMENT_INSERT_QUERY, batch_data, types_check=False)
             return True
         except Exception as e:
             retry_count += 1
@@ -853,33 +894,35 @@ def push_measurements_clickhouse(connection_params, measurements, batch_size=100
     # Use datetime object for clickhouse-driver (as required)
     current_time = datetime.now()
     
-    # DIRECT conversion to clickhouse-driver format (list of tuples)
-    data_tuples = []
-    for m in measurements:
-        data_tuples.append((
-            m['WLD_ID'],
-            m['WTP_ID'],
-            int(m['WP_POS_X']),
-            int(m['WP_POS_Y']),
-            float(m['WPTM_VALUE']),
-            current_time,  # datetime object as required by clickhouse-driver
-            1 if m['TEST_FLAG'] else 0,
-            0,  # Skip expensive segment calculation
-            m.get('FILE_HASH', '')
-        ))
+    # DIRECT conversion to clickhouse-driver columnar format (one list per column)
+    # Native blocks are column-oriented, so the driver can serialize these without re-pivoting rows
+    row_count = len(measurements)
+    data_columns = [
+        [m['WLD_ID'] for m in measurements],
+        [m['WTP_ID'] for m in measurements],
+        [int(m['WP_POS_X']) for m in measurements],
+        [int(m['WP_POS_Y']) for m in measurements],
+        [float(m['WPTM_VALUE']) for m in measurements],
+        [current_time] * row_count,  # datetime object as required by clickhouse-driver
+        [1 if m['TEST_FLAG'] else 0 for m in measurements],
+        [0] * row_count,  # Skip expensive segment calculation
+        [m.get('FILE_HASH', '') for m in measurements]
+    ]
     
     convert_time = time.time() - convert_start
-    print(f"✅ Data converted in {convert_time:.2f}s ({len(measurements)/convert_time:.0f} records/sec)")
+    print(f"✅ Data converted in {convert_time:.2f}s ({row_count/convert_time:.0f} records/sec)")
     
     # Single massive insert with native TCP (fastest possible)
     print("⚡ Single massive native TCP insert...")
-    print(f"📊 Insert format: {len(data_tuples):,} tuples, sample: {data_tuples[0] if data_tuples else 'None'}")
+    sample_row = tuple(column[0] for column in data_columns) if row_count else 'None'
+    print(f"📊 Insert format: {len(data_columns)} columns x {row_count:,} rows, sample: {sample_row}")
     insert_start = time.time()
     
-    # Simple clickhouse-driver insert
+    # Columnar clickhouse-driver insert
     client.execute(
         "INSERT INTO measurements (wld_id, wtp_id, wp_pos_x, wp_pos_y, wptm_value, wptm_created_date, test_flag, segment, file_hash) VALUES",
-        data_tuples
+        data_columns,
+        columnar=True
     )
     
     insert_time = time.time() - insert_start
@@ -9,20 +9,30 @@ import os
 import platform
 import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import count, repeat
+
+# Resolved once at import; setup_platform_libraries() is called before every C++ run
+_SYSTEM = platform.system().lower()
+_LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cpp", "third_party", "lib")
+_libraries_ready = False
 
 def setup_platform_libraries():
-    """Setup libraries for the current platform"""
-    system = platform.system().lower()
-    if system == "linux":
-        lib_dir = os.path.join(os.path.dirname(__file__), "cpp", "third_party", "lib")
+    """Setup libraries for the current platform (no-op after the first call)"""
+    global _libraries_ready
+    if _libraries_ready:
+        return
+    _libraries_ready = True
+    
+    if _SYSTEM == "linux":
         current_path = os.environ.get("LD_LIBRARY_PATH", "")
-        if lib_dir not in current_path:
-            os.environ["LD_LIBRARY_PATH"] = f"{lib_dir}:{current_path}" if current_path else lib_dir
-    elif system == "windows":
-        lib_dir = os.path.join(os.path.dirname(__file__), "cpp", "third_party", "lib")
-        if os.path.exists(lib_dir) and hasattr(os, 'add_dll_directory'):
+        if _LIB_DIR not in current_path:
+            os.environ["LD_LIBRARY_PATH"] = f"{_LIB_DIR}:{current_path}" if current_path else _LIB_DIR
+    elif _SYSTEM == "windows":
+        if os.path.exists(_LIB_DIR) and hasattr(os, 'add_dll_directory'):
             try:
-                os.add_dll_directory(lib_dir)
+                os.add_dll_directory(_LIB_DIR)
             except:
                 pass
 
@@ -54,86 +64,86 @@ def run_cpp_extraction(stdf_file):
         print(f"❌ C++ extraction failed: {e}")
         return None, 0
 
+@lru_cache(maxsize=1)
+def _pystdf_schemas():
+    """{record name: (pystdf record type, field names)} for every STDF V4 record, built once per process"""
+    import pystdf.V4 as v4
+    return {rt.name.split('.')[-1].upper(): (rt, tuple(rt.fieldNames)) for rt in v4.records}
+
+class PystdfRecordSink:
+    """pystdf sink that turns each required record straight into a {field: value} dict
+    
+    Values are formatted exactly like TextWriter would print them, so they compare
+    the same as the old ATDF text round-trip without building or re-splitting any text.
+    Only the first max_samples records of each type are kept (plus a count of all of
+    them), so memory stays flat no matter how large the STDF file is.
+    """
+    
+    def __init__(self, required_records, max_samples=2):
+        from pystdf.Writers import TextWriter
+        self.text_format = TextWriter().text_format
+        self.max_samples = max_samples
+        self.raw_records = {record_name: [] for record_name in required_records}
+        self.record_counts = defaultdict(int)
+        
+        # Dispatch on the record type object itself: one dict lookup filters the record and
+        # yields its name, cached schema and bucket, with no per-record class-name string work
+        schemas = _pystdf_schemas()
+        self._dispatch = {
+            schemas[record_name][0]: (record_name, schemas[record_name][1], bucket)
+            for record_name, bucket in self.raw_records.items() if record_name in schemas
+        }
+    
+    @property
+    def record_types(self):
+        """pystdf record types this sink consumes (pass as Parser(recTypes=...))"""
+        return list(self._dispatch)
+    
+    def after_send(self, dataSource, data):
+        record_type, values = data
+        entry = self._dispatch.get(record_type)
+        if entry is None:
+            return
+        
+        record_name, field_names, bucket = entry
+        self.record_counts[record_name] += 1
+        if len(bucket) >= self.max_samples:
+            return
+        
+        # One fused pass: format every value and pair it with its field name in C-level iterators
+        bucket.append(dict(zip(field_names, map(self.text_format, repeat(record_type), count(), values))))
+
 def run_pystdf_extraction(stdf_file):
-    """Run pystdf version and extract sample records using STDF_Parser_CH approach"""
+    """Run pystdf version and extract sample records (same fields as the STDF_Parser_CH ATDF approach)"""
     try:
-        import pystdf.V4 as v4
         from pystdf.IO import Parser
-        from pystdf.Writers import TextWriter
-        from io import StringIO
         print("✅ pystdf loaded successfully")
         
         start_time = time.time()
         
-        # Use same approach as STDF_Parser_CH
+        # Parse records like STDF_Parser_CH does, but receive them as parsed tuples
+        required_records = ['MIR', 'PIR', 'PRR', 'PTR', 'MPR', 'FTR', 'HBR', 'SBR']
+        sink = PystdfRecordSink(required_records)
+        
+        # Passing only the required types makes the Parser skip every other record's bytes undecoded.
         with open(stdf_file, 'rb') as f_in:
-            p = Parser(inp=f_in)
-            captured_std_out = StringIO()
-            p.addSink(TextWriter(captured_std_out))
+            p = Parser(recTypes=sink.record_types, inp=f_in)
+            p.addSink(sink)
             p.parse()
-            atdf = captured_std_out.getvalue()
-        
-        # Split into lines like STDF_Parser_CH
-        record_lines = atdf.split('\n')
-        print(f"pystdf generated {len(record_lines)} text lines")
-        
-        # Debug: Show sample lines to understand format
-        print("DEBUG: Sample pystdf output lines:")
-        for i, line in enumerate(record_lines[:10]):
-            if line.strip():
-                print(f"  {i}: {line}")
-        
-        # Debug: Show PTR lines specifically
-        ptr_lines = [line for line in record_lines if line.startswith('PTR')][:2]
-        print("DEBUG: Sample PTR lines:")
-        for i, line in enumerate(ptr_lines):
-            print(f"  PTR{i}: {line}")
-            fields = line.split('|')
-            print(f"    Split into {len(fields)} fields: {fields[:10]}...")  # Show first 10 fields
         
-        # Parse records like STDF_Parser_CH does
-        required_records = ['MIR', 'PIR', 'PRR', 'PTR', 'MPR', 'FTR', 'HBR', 'SBR']
-        raw_records = {}
+        raw_records = sink.raw_records
         
-        # Parse records with proper field alignment
-        for record_type in v4.records:
-            record_name = record_type.name.split('.')[-1].upper()
-            if record_name in required_records:
-                curr = [line for line in record_lines if line.startswith(record_name)]
-                if curr:
-                    raw_records[record_name] = []
-                    # Get field names from pystdf record definition
-                    header_names = list(list(zip(*record_type.fieldMap))[0])
-                    
-                    for line in curr:
-                        fields = line.split('|')
-                        # Skip the first few fields (record type, etc.) and properly align
-                        if len(fields) >= len(header_names):
-                            # The pystdf TextWriter format is: RECORD|field1|field2|...
-                            # We need to skip the record name and align properly
-                            data_fields = fields[1:]  # Skip record name
-                            
-                            # Ensure we have enough fields
-                            while len(data_fields) < len(header_names):
-                                data_fields.append('')
-                            
-                            # Create record with proper field alignment
-                            record_data = {}
-                            for i, field_name in enumerate(header_names):
-                                if i < len(data_fields):
-                                    record_data[field_name] = data_fields[i]
-                                else:
-                                    record_data[field_name] = ''
-                                    
-                            raw_records[record_name].append(record_data)
+        # Debug: Show PTR records specifically
+        print("DEBUG: Sample PTR records:")
+        for i, record in enumerate(raw_records.get('PTR', [])[:2]):
+            print(f"  PTR{i}: {len(record)} fields: {list(record.items())[:10]}...")  # Show first 10 fields
         
         # Get first sample of each record type
         pystdf_samples = {}
-        record_counts = {}
+        record_counts = dict(sink.record_counts)
         
         for record_name, records in raw_records.items():
             if records:
-                record_counts[record_name] = len(records)
                 pystdf_samples[record_name] = records[0]  # First sample
         
         end_time = time.time()
@@ -149,8 +159,9 @@ def run_pystdf_extraction(stdf_file):
         traceback.print_exc()
         return None, 0
 
+@lru_cache(maxsize=4096)
 def normalize_field_name(field_name):
-    """Normalize field names for comparison"""
+    """Normalize field names for comparison (cached: every record type reuses the same names)"""
     # Convert to lowercase and remove common prefixes/suffixes
     normalized = field_name.lower()
     
@@ -161,8 +172,8 @@ def normalize_field_name(field_name):
     
     return normalized
 
-def compare_record_fields(cpp_record, pystdf_record, record_type):
-    """Compare fields between C++ and pystdf records"""
+def compare_record_fields(cpp_record, pystdf_record, record_type, verbose=False):
+    """Compare fields between C++ and pystdf records (verbose: also dump every field and matching value)"""
     print(f"\n{'='*60}")
     print(f"COMPARING {record_type} RECORD FIELDS")
     print(f"{'='*60}")
@@ -174,27 +185,28 @@ def compare_record_fields(cpp_record, pystdf_record, record_type):
     # Combine all C++ fields
     all_cpp_fields = {**cpp_direct_fields, **cpp_fields}
     
-    print(f"\n--- C++ {record_type} Fields ({len(all_cpp_fields)}) ---")
-    for key, value in sorted(all_cpp_fields.items()):
-        print(f"  {key:<20} = {value}")
-    
-    print(f"\n--- pystdf {record_type} Fields ({len(pystdf_record)}) ---")
-    for key, value in sorted(pystdf_record.items()):
-        print(f"  {key:<20} = {value}")
+    if verbose:
+        print(f"\n--- C++ {record_type} Fields ({len(all_cpp_fields)}) ---")
+        for key, value in sorted(all_cpp_fields.items()):
+            print(f"  {key:<20} = {value}")
+        
+        print(f"\n--- pystdf {record_type} Fields ({len(pystdf_record)}) ---")
+        for key, value in sorted(pystdf_record.items()):
+            print(f"  {key:<20} = {value}")
     
     # Field comparison analysis
     print(f"\n--- FIELD COMPARISON ANALYSIS ---")
     
-    cpp_field_set = set(all_cpp_fields.keys())
-    pystdf_field_set = set(pystdf_record.keys())
-    
     # Normalize field names for better matching
-    cpp_normalized = {normalize_field_name(f): f for f in cpp_field_set}
-    pystdf_normalized = {normalize_field_name(f): f for f in pystdf_field_set}
+    cpp_normalized = {normalize_field_name(f): f for f in all_cpp_fields}
+    pystdf_normalized = {normalize_field_name(f): f for f in pystdf_record}
     
-    normalized_common = set(cpp_normalized.keys()) & set(pystdf_normalized.keys())
-    cpp_only_normalized = set(cpp_normalized.keys()) - set(pystdf_normalized.keys())
-    pystdf_only_normalized = set(pystdf_normalized.keys()) - set(cpp_normalized.keys())
+    # dict key views support set operations directly, no intermediate sets needed
+    cpp_keys = cpp_normalized.keys()
+    pystdf_keys = pystdf_normalized.keys()
+    normalized_common = cpp_keys & pystdf_keys
+    cpp_only_normalized = cpp_keys - pystdf_keys
+    pystdf_only_normalized = pystdf_keys - cpp_keys
     
     print(f"Common fields (normalized, {len(normalized_common)}): {sorted(normalized_common)}")
     print(f"C++ only (normalized, {len(cpp_only_normalized)}): {sorted(cpp_only_normalized)}")
@@ -217,8 +229,9 @@ def compare_record_fields(cpp_record, pystdf_record, record_type):
             different_fields.append((norm_field, cpp_field, pystdf_field, cpp_value, pystdf_value))
     
     print(f"\n✅ MATCHING VALUES ({len(matching_fields)}):")
-    for field, value in sorted(matching_fields):
-        print(f"  {field:<20} = '{value}'")
+    if verbose:
+        for field, value in sorted(matching_fields):
+            print(f"  {field:<20} = '{value}'")
     
     if different_fields:
         print(f"\n❌ DIFFERENT VALUES ({len(different_fields)}):")
@@ -255,8 +268,8 @@ def compare_record_fields(cpp_record, pystdf_record, record_type):
         'different_values': len(different_fields)
     }
 
-def main():
-    """Main comparison function"""
+def main(verbose=False):
+    """Main comparison function (verbose: print every field of every compared record)"""
     print("FIELD EXTRACTION COMPARISON: C++ libstdf vs Python pystdf")
     print("=" * 80)
     
@@ -274,12 +287,14 @@ def main():
     test_file = os.path.join(stdf_dir, stdf_files[0])
     print(f"📁 Testing with: {os.path.basename(test_file)}")
     
-    # Run both extractors
-    print(f"\n🔄 Running C++ extraction...")
-    cpp_samples, cpp_time = run_cpp_extraction(test_file)
-    
-    print(f"\n🔄 Running pystdf extraction...")
-    pystdf_samples, pystdf_time = run_pystdf_extraction(test_file)
+    # Run both extractors side by side. parse_stdf_file holds the GIL for the whole parse,
+    # so threads would serialize; separate processes let the two runs overlap.
+    print(f"\n🔄 Running C++ and pystdf extraction in parallel...")
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        cpp_future = executor.submit(run_cpp_extraction, test_file)
+        pystdf_future = executor.submit(run_pystdf_extraction, test_file)
+        cpp_samples, cpp_time = cpp_future.result()
+        pystdf_samples, pystdf_time = pystdf_future.result()
     
     if not cpp_samples or not pystdf_samples:
         print("❌ One or both extractors failed")
@@ -311,7 +326,7 @@ def main():
         cpp_sample = cpp_samples[cpp_type]
         pystdf_sample = pystdf_samples[pystdf_type]
         
-        results = compare_record_fields(cpp_sample, pystdf_sample, cpp_type)
+        results = compare_record_fields(cpp_sample, pystdf_sample, cpp_type, verbose=verbose)
         comparison_results[cpp_type] = results
     
     # Summary table
@@ -326,5 +341,5 @@ def main():
     return True
 
 if __name__ == "__main__":
-    success = main()
+    success = main(verbose='--verbose' in sys.argv[1:])
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -6,21 +6,64 @@ Side-by-side performance and accuracy testing
 import os
 import sys
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import lru_cache
 from io import StringIO
-import pystdf.V4 as v4
-from pystdf.IO import Parser
-from pystdf.Writers import TextWriter
 
-def test_python_parser(file_path):
-    """Test Python pystdf parser with same record types as C++ parser"""
+@lru_cache(maxsize=1)
+def _pystdf_schemas():
+    """{NAME: (pystdf record type, field names)} for every pystdf.V4 record, built once"""
+    import pystdf.V4 as v4
+    return {
+        record_type.name.split('.')[-1].upper(): (record_type, [field_name for field_name, _ in record_type.fieldMap])
+        for record_type in v4.records
+    }
+
+class RecordSink:
+    """pystdf sink that keeps the wanted record types as positional field lists
+    
+    Records arrive already decoded from the binary, so there is no ATDF text to
+    write, split and re-parse. Each record is kept as the field list pystdf built,
+    in header_names[record_name] order, so no per-record dict is allocated.
+    """
+    
+    def __init__(self, record_names):
+        self.raw_records = {}
+        self.header_names = {}
+        self._dispatch = {}
+        schemas = _pystdf_schemas()
+        for record_name in record_names:
+            if record_name in schemas:
+                record_type, header_names = schemas[record_name]
+                self.header_names[record_name] = header_names
+                self._dispatch[record_type] = record_name
+    
+    @property
+    def record_types(self):
+        """pystdf record types this sink consumes (pass as Parser(recTypes=...))"""
+        return list(self._dispatch)
+    
+    def after_send(self, dataSource, data):
+        record_type, fields = data
+        record_name = self._dispatch.get(record_type)
+        if record_name is not None:
+            self.raw_records.setdefault(record_name, []).append(fields)
+
+def test_python_parser(file_path, filename=None):
+    """Test Python pystdf parser with same record types as C++ parser
+    
+    filename: basename already resolved (and the file already checked) by the caller
+    """
     print("🐍 Testing Python Parser (pystdf)")
     print("=" * 50)
     
-    if not os.path.exists(file_path):
-        print(f"❌ File not found: {file_path}")
-        return None
-        
-    filename = os.path.basename(file_path)
+    if filename is None:
+        if not os.path.exists(file_path):
+            print(f"❌ File not found: {file_path}")
+            return None
+        filename = os.path.basename(file_path)
     print(f"📁 File: {filename}")
     
     # C++ parser record types (same as our fixed C++ parser)
@@ -28,82 +71,35 @@ def test_python_parser(file_path):
     print(f"🎯 Target record types: {cpp_record_types}")
     
     try:
-        # Step 1: Parse STDF binary to text
-        print(f"🔄 Step 1: Parsing STDF binary to text...")
-        step1_start = time.time()
-        
-        with open(file_path, 'rb') as f_in:
-            p = Parser(inp=f_in)
-            captured_std_out = StringIO()
-            p.addSink(TextWriter(captured_std_out))
-            p.parse()
-            atdf = captured_std_out.getvalue()
+        # Only this parser needs pystdf, so the C++-only path never imports it
+        from pystdf.IO import Parser
         
-        step1_end = time.time()
-        step1_time = step1_end - step1_start
-        print(f"✅ Binary parsing: {step1_time:.2f}s")
+        # Requested types pystdf has no record definition for can never be found;
+        # one set difference against the cached schemas reports them up front
+        for record_name in sorted(set(cpp_record_types) - _pystdf_schemas().keys()):
+            print(f"🔍 {record_name} is not defined in pystdf.V4.records")
         
-        # Step 2: Convert text to records (ONLY C++ types)
-        print(f"🔄 Step 2: Converting to records...")
-        step2_start = time.time()
-        
-        atdf_lines = atdf.split('\n')
-        print(f"📝 Raw lines: {len(atdf_lines):,}")
-        
-        # Debug: Check first few lines
-        print(f"🔍 Debug - First 5 lines of ATDF:")
-        for i, line in enumerate(atdf_lines[:5]):
-            print(f"  Line {i}: {line[:100]}..." if len(line) > 100 else f"  Line {i}: {line}")
-        
-        # Add line numbers and filename
-        for n, line in enumerate(atdf_lines):
-            if len(line) >= 4:
-                atdf_lines[n] = line[:4] + str(n) + '|' + filename + '|' + line[4:]
-        
-        # Parse ONLY C++ supported record types
-        raw_records = {}
-        total_parsed_records = 0
-        
-        # First, try to find records using pystdf.V4.records
-        for record_type in v4.records:
-            record_name = record_type.name.split('.')[-1].upper()
-            if record_name in cpp_record_types:
-                curr = [line for line in atdf_lines if line.startswith(record_name)]
-                if curr:
-                    raw_records[record_name] = []
-                    header_names = list(list(zip(*record_type.fieldMap))[0])
-                    for line in curr:
-                        fields = line.split('|')
-                        if len(fields) > 2:
-                            record_data = dict(zip(header_names, fields[2:]))
-                            raw_records[record_name].append(record_data)
-                            total_parsed_records += 1
+        # Parse STDF binary straight into records (ONLY C++ types)
+        print(f"🔄 Parsing STDF binary to records...")
+        start_time = time.time()
         
-        # Additionally, search for any missing record types directly in the text
-        # This handles cases where pystdf might not have all record types defined
-        for record_name in cpp_record_types:
-            if record_name not in raw_records:
-                curr = [line for line in atdf_lines if line.startswith(record_name)]
-                if curr:
-                    raw_records[record_name] = []
-                    for line in curr:
-                        fields = line.split('|')
-                        if len(fields) > 2:
-                            # Create a basic record with available fields
-                            record_data = {'raw_line': line}
-                            raw_records[record_name].append(record_data)
-                            total_parsed_records += 1
-                    print(f"🔍 Found {len(curr)} {record_name} records not in pystdf.V4.records")
+        sink = RecordSink(cpp_record_types)
+        with open(file_path, 'rb') as f_in:
+            # Only the wanted types are decoded; the Parser skips every other record's bytes
+            p = Parser(recTypes=sink.record_types, inp=f_in)
+            p.addSink(sink)
+            p.parse()
         
-        step2_end = time.time()
-        step2_time = step2_end - step2_start
-        print(f"✅ Text to records: {step2_time:.2f}s")
+        raw_records = sink.raw_records
+        record_counts = {record_type: len(records) for record_type, records in raw_records.items()}
+        total_parsed_records = sum(record_counts.values())
         
-        total_time = step1_time + step2_time
+        total_time = time.time() - start_time
+        print(f"✅ Binary to records: {total_time:.2f}s")
         
         print(f"\\n📊 Python Results:")
-        for record_type in sorted(raw_records.keys(), key=lambda x: len(raw_records[x]), reverse=True):
-            count = len(raw_records[record_type])
+        for record_type in sorted(record_counts, key=record_counts.get, reverse=True):
+            count = record_counts[record_type]
             if count > 0:
                 print(f"  {record_type}: {count:,} records")
         
@@ -117,9 +113,7 @@ def test_python_parser(file_path):
             'total_records': total_parsed_records,
             'parse_time': total_time,
             'records_per_second': total_parsed_records/total_time,
-            'record_types': {k: len(v) for k, v in raw_records.items()},
-            'step1_time': step1_time,
-            'step2_time': step2_time
+            'record_types': record_counts
         }
         
     except Exception as e:
@@ -128,20 +122,22 @@ def test_python_parser(file_path):
         traceback.print_exc()
         return None
 
-def test_cpp_parser(file_path):
-    """Test C++ libstdf parser"""
+def test_cpp_parser(file_path, filename=None):
+    """Test C++ libstdf parser (filename: basename already resolved by the caller)"""
     print("\\n🚀 Testing C++ Parser (libstdf)")
     print("=" * 50)
     
     try:
         import stdf_parser_cpp
         
-        filename = os.path.basename(file_path)
+        if filename is None:
+            filename = os.path.basename(file_path)
         print(f"📁 File: {filename}")
         
         print(f"🔄 Parsing with C++ parser...")
         start_time = time.time()
-        result = stdf_parser_cpp.parse_stdf_file(file_path)
+        # Only per-type counts are needed, so skip building a Python dict per record
+        result = stdf_parser_cpp.count_record_types(file_path)
         end_time = time.time()
         
         cpp_time = end_time - start_time
@@ -149,16 +145,10 @@ def test_cpp_parser(file_path):
         if isinstance(result, dict):
             total_records = result.get('total_records', 0)
             parsed_records = result.get('parsed_records', 0)
-            records = result.get('records', [])
-            
-            # Count record types
-            record_types = {}
-            for record in records:
-                rec_type = record.get('record_type', 'UNKNOWN')
-                record_types[rec_type] = record_types.get(rec_type, 0) + 1
+            record_types = result.get('record_types', {})
             
             print(f"\\n📊 C++ Results:")
-            for rec_type in sorted(record_types.keys(), key=lambda x: record_types[x], reverse=True):
+            for rec_type in sorted(record_types, key=record_types.get, reverse=True):
                 count = record_types[rec_type]
                 if count > 0:
                     print(f"  {rec_type}: {count:,} records")
@@ -211,12 +201,14 @@ def compare_results(python_result, cpp_result):
     print(f"{'Type':<8} {'Python':<10} {'C++':<10} {'Diff':<8} {'Status'}")
     print("-" * 45)
     
-    all_types = set(python_result['record_types'].keys()) | set(cpp_result['record_types'].keys())
+    # Counters read 0 for a type only one side found, and their union is every type seen
+    py_counts = Counter(python_result['record_types'])
+    cpp_counts = Counter(cpp_result['record_types'])
     record_diff_total = 0
     
-    for rec_type in sorted(all_types):
-        py_count = python_result['record_types'].get(rec_type, 0)
-        cpp_count = cpp_result['record_types'].get(rec_type, 0)
+    for rec_type in sorted(py_counts | cpp_counts):
+        py_count = py_counts[rec_type]
+        cpp_count = cpp_counts[rec_type]
         diff = cpp_count - py_count
         record_diff_total += abs(diff)
         
@@ -245,14 +237,13 @@ def compare_results(python_result, cpp_result):
         print("  ⚠️  Good accuracy")
     else:
         print("  ❌ Significant difference detected")
-    
-    # Efficiency breakdown (Python only)
-    if 'step1_time' in python_result and 'step2_time' in python_result:
-        print(f"\\n🔧 Python Parser Breakdown:")
-        step1_pct = (python_result['step1_time'] / python_result['parse_time']) * 100
-        step2_pct = (python_result['step2_time'] / python_result['parse_time']) * 100
-        print(f"  Binary→Text: {python_result['step1_time']:.2f}s ({step1_pct:.1f}%)")
-        print(f"  Text→Records: {python_result['step2_time']:.2f}s ({step2_pct:.1f}%)")
+
+def _run_captured(test_func, *args):
+    """Run test_func, returning (result, everything it printed)"""
+    output = StringIO()
+    with redirect_stdout(output):
+        result = test_func(*args)
+    return result, output.getvalue()
 
 def main():
     """Main comparison test"""
@@ -262,17 +253,27 @@ def main():
     # Test file
     test_file = "STDF_Files/OSBE25_KEWGBBMD1U_BE_HRG39021_KEWGBBMD1U__Prod_TPP202_03_Agilent_93000MT9510_25C_5215_4_20241017193900.stdf"
     
-    if not os.path.exists(test_file):
+    # One stat answers both "does it exist" and "how big is it"
+    try:
+        file_size = os.stat(test_file).st_size
+    except FileNotFoundError:
         print(f"❌ Test file not found: {test_file}")
         print("Make sure the STDF file exists in the STDF_Files directory")
         return
     
-    print(f"📁 Testing with: {os.path.basename(test_file)}")
-    print(f"📏 File size: {os.path.getsize(test_file) / (1024*1024):.1f} MB")
+    filename = os.path.basename(test_file)
+    print(f"📁 Testing with: {filename}")
+    print(f"📏 File size: {file_size / (1024*1024):.1f} MB")
     
-    # Run both parsers
-    python_result = test_python_parser(test_file)
-    cpp_result = test_cpp_parser(test_file)
+    # Run both parsers in separate processes (pystdf holds the GIL), then print
+    # each report whole so the two don't interleave
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        python_future = executor.submit(_run_captured, test_python_parser, test_file, filename)
+        cpp_future = executor.submit(_run_captured, test_cpp_parser, test_file, filename)
+        python_result, python_output = python_future.result()
+        cpp_result, cpp_output = cpp_future.result()
+    print(python_output, end='')
+    print(cpp_output, end='')
     
     # Compare results
     compare_results(python_result, cpp_result)
@@ -3,6 +3,7 @@
 #include "../include/dynamic_field_extractor.h"
 #include "../include/ultra_fast_processor.h"
 #include <iostream>
+#include <map>
 #include <vector>
 
 // Python extension module for STDF parsing
@@ -118,6 +119,163 @@ static PyObject* parse_stdf_file(PyObject* self, PyObject* args) {
     }
 }
 
+// Python function: parse_stdf_file_columnar(filepath)
+// Same records as parse_stdf_file, laid out as one list per field instead of one dict per record:
+//   {'record_type': [str], 'fields': {name: [str or None]}, 'total_records', 'parsed_records'}
+// Row i of every list belongs to record i; fields a record doesn't carry are None.
+static PyObject* parse_stdf_file_columnar(PyObject* self, PyObject* args) {
+    const char* filepath;
+
+    // Parse arguments
+    if (!PyArg_ParseTuple(args, "s", &filepath)) {
+        return nullptr;
+    }
+
+    try {
+        STDFParser parser;
+        std::vector<STDFRecord> records = parser.parse_file(std::string(filepath));
+        const Py_ssize_t row_count = static_cast<Py_ssize_t>(records.size());
+
+        PyObject* type_list = PyList_New(row_count);
+        PyObject* fields_dict = PyDict_New();
+        // One shared string per record type and one list per field name (borrowed from fields_dict)
+        std::map<STDFRecordType, PyObject*> type_names;
+        std::map<std::string, PyObject*> columns;
+        bool ok = type_list && fields_dict;
+
+        for (Py_ssize_t i = 0; ok && i < row_count; ++i) {
+            const STDFRecord& record = records[i];
+
+            PyObject*& type_name = type_names[record.type];
+            if (!type_name) {
+                type_name = PyUnicode_FromString(record_type_to_string(record.type));
+                if (!type_name) {
+                    ok = false;
+                    break;
+                }
+            }
+            Py_INCREF(type_name);
+            PyList_SET_ITEM(type_list, i, type_name);
+
+            for (const auto& field : record.fields) {
+                PyObject*& column = columns[field.first];
+                if (!column) {
+                    // First record with this field: every row defaults to None
+                    PyObject* new_column = PyList_New(row_count);
+                    if (!new_column) {
+                        ok = false;
+                        break;
+                    }
+                    for (Py_ssize_t row = 0; row < row_count; ++row) {
+                        Py_INCREF(Py_None);
+                        PyList_SET_ITEM(new_column, row, Py_None);
+                    }
+                    PyObject* key = safe_unicode_from_string(field.first);
+                    ok = key && PyDict_SetItem(fields_dict, key, new_column) == 0;
+                    Py_XDECREF(key);
+                    Py_DECREF(new_column);
+                    if (!ok) {
+                        break;
+                    }
+                    column = new_column;
+                }
+
+                PyObject* value = safe_unicode_from_string(field.second);
+                if (!value) {
+                    ok = false;
+                    break;
+                }
+                PyObject* previous = PyList_GET_ITEM(column, i);
+                PyList_SET_ITEM(column, i, value);
+                Py_DECREF(previous);
+            }
+        }
+
+        for (auto& entry : type_names) {
+            Py_XDECREF(entry.second);
+        }
+        if (!ok) {
+            Py_XDECREF(type_list);
+            Py_XDECREF(fields_dict);
+            return nullptr;
+        }
+
+        PyObject* result_dict = PyDict_New();
+        if (!result_dict) {
+            Py_DECREF(type_list);
+            Py_DECREF(fields_dict);
+            return nullptr;
+        }
+        PyDict_SetItemString(result_dict, "record_type", type_list);
+        Py_DECREF(type_list);
+        PyDict_SetItemString(result_dict, "fields", fields_dict);
+        Py_DECREF(fields_dict);
+        PyDict_SetItemString(result_dict, "total_records",
+                           PyLong_FromSize_t(parser.get_total_records()));
+        PyDict_SetItemString(result_dict, "parsed_records",
+                           PyLong_FromSize_t(parser.get_parsed_records()));
+
+        return result_dict;
+
+    } catch (const std::exception& e) {
+        PyErr_SetString(PyExc_RuntimeError, e.what());
+        return nullptr;
+    }
+}
+
+// Python function: count_record_types(filepath)
+static PyObject* count_record_types(PyObject* self, PyObject* args) {
+    const char* filepath;
+    
+    // Parse arguments
+    if (!PyArg_ParseTuple(args, "s", &filepath)) {
+        return nullptr;
+    }
+    
+    try {
+        STDFParser parser;
+        std::vector<STDFRecord> records = parser.parse_file(std::string(filepath));
+        
+        // Tally in C++ so no per-record Python objects are built; keep first-seen order
+        std::map<STDFRecordType, size_t> counts;
+        std::vector<STDFRecordType> seen_order;
+        for (const auto& record : records) {
+            if (counts[record.type]++ == 0) {
+                seen_order.push_back(record.type);
+            }
+        }
+        
+        PyObject* counts_dict = PyDict_New();
+        if (!counts_dict) {
+            return nullptr;
+        }
+        for (STDFRecordType type : seen_order) {
+            PyObject* count = PyLong_FromSize_t(counts[type]);
+            PyDict_SetItemString(counts_dict, record_type_to_string(type), count);
+            Py_XDECREF(count);
+        }
+        
+        // Same statistics as parse_stdf_file, with counts in place of the record list
+        PyObject* result_dict = PyDict_New();
+        if (!result_dict) {
+            Py_DECREF(counts_dict);
+            return nullptr;
+        }
+        PyDict_SetItemString(result_dict, "record_types", counts_dict);
+        Py_DECREF(counts_dict);
+        PyDict_SetItemString(result_dict, "total_records", 
+                           PyLong_FromSize_t(parser.get_total_records()));
+        PyDict_SetItemString(result_dict, "parsed_records", 
+                           PyLong_FromSize_t(parser.get_parsed_records()));
+        
+        return result_dict;
+        
+    } catch (const std::exception& e) {
+        PyErr_SetString(PyExc_RuntimeError, e.what());
+        return nullptr;
+    }
+}
+
 // Python function: get_version()
 static PyObject* get_version(PyObject* self, PyObject* args) {
     return PyUnicode_FromString("STDFParser C++ Extension v1.0.0");
@@ -294,15 +452,49 @@ static PyObject* process_stdf_to_clickhouse_tuples(PyObject* self, PyObject* arg
     }
 }
 
+// Fill one columnar output list from a MeasurementTuple member
+template <typename T, typename Convert>
+static bool fill_measurement_column(PyObject* column, const std::vector<MeasurementTuple>& measurements,
+                                    T MeasurementTuple::*member, Convert convert) {
+    for (size_t i = 0; i < measurements.size(); ++i) {
+        PyObject* item = convert(measurements[i].*member);
+        if (!item) return false;
+        PyList_SET_ITEM(column, i, item);
+    }
+    return true;
+}
+
+// String columns repeat in runs (file hash, device per PRR, param per test):
+// consecutive equal values share one Python string instead of one per row
+template <typename Convert>
+static bool fill_measurement_column(PyObject* column, const std::vector<MeasurementTuple>& measurements,
+                                    std::string MeasurementTuple::*member, Convert convert) {
+    PyObject* previous = nullptr;
+    const std::string* previous_value = nullptr;
+    for (size_t i = 0; i < measurements.size(); ++i) {
+        const std::string& value = measurements[i].*member;
+        if (previous && value == *previous_value) {
+            Py_INCREF(previous);
+        } else {
+            previous = convert(value);
+            if (!previous) return false;
+            previous_value = &value;
+        }
+        PyList_SET_ITEM(column, i, previous);
+    }
+    return true;
+}
+
 // 🔧 DATABASE-AWARE: Process STDF with existing database mappings
 static PyObject* process_stdf_with_database_mappings(PyObject* self, PyObject* args) {
     const char* filepath;
     PyObject* device_mappings_list;
     PyObject* param_mappings_list;
     const char* file_hash = "";
+    int columnar = 0;
     
-    // Parse arguments: filepath, device_mappings, param_mappings, file_hash (optional)
-    if (!PyArg_ParseTuple(args, "sOO|s", &filepath, &device_mappings_list, &param_mappings_list, &file_hash)) {
+    // Parse arguments: filepath, device_mappings, param_mappings, file_hash (optional), columnar (optional)
+    if (!PyArg_ParseTuple(args, "sOO|sp", &filepath, &device_mappings_list, &param_mappings_list, &file_hash, &columnar)) {
         return nullptr;
     }
     
@@ -377,26 +569,50 @@ static PyObject* process_stdf_with_database_mappings(PyObject* self, PyObject* a
         #undef MEASUREMENT_FIELD
         ;
         
-        PyObject* tuple_list = PyList_New(measurements.size());
-        if (!tuple_list) return nullptr;
-        
-        for (size_t i = 0; i < measurements.size(); ++i) {
-            const auto& m = measurements[i];
-            
-            PyObject* tuple = PyTuple_New(TUPLE_SIZE);
-            if (!tuple) {
-                Py_DECREF(tuple_list);
-                return nullptr;
-            }
+        // Columnar mode: one list per field instead of one tuple per measurement
+        PyObject* column_dict = nullptr;
+        PyObject* tuple_list = nullptr;
+        if (columnar) {
+            column_dict = PyDict_New();
+            if (!column_dict) return nullptr;
             
-            size_t field_index = 0;
             #define MEASUREMENT_FIELD(name, cpp_type, python_conversion, clickhouse_type) \
-                PyTuple_SetItem(tuple, field_index++, python_conversion(m.name));
+            { \
+                PyObject* column = PyList_New(measurements.size()); \
+                if (!column || !fill_measurement_column(column, measurements, &MeasurementTuple::name, \
+                                                        python_conversion)) { \
+                    Py_XDECREF(column); \
+                    Py_DECREF(column_dict); \
+                    return nullptr; \
+                } \
+                PyDict_SetItemString(column_dict, #name, column); \
+                Py_DECREF(column); \
+            }
             
             #include "../include/measurement_fields.def"
             #undef MEASUREMENT_FIELD
+        } else {
+            tuple_list = PyList_New(measurements.size());
+            if (!tuple_list) return nullptr;
             
-            PyList_SetItem(tuple_list, i, tuple);
+            for (size_t i = 0; i < measurements.size(); ++i) {
+                const auto& m = measurements[i];
+                
+                PyObject* tuple = PyTuple_New(TUPLE_SIZE);
+                if (!tuple) {
+                    Py_DECREF(tuple_list);
+                    return nullptr;
+                }
+                
+                size_t field_index = 0;
+                #define MEASUREMENT_FIELD(name, cpp_type, python_conversion, clickhouse_type) \
+                    PyTuple_SetItem(tuple, field_index++, python_conversion(m.name));
+                
+                #include "../include/measurement_fields.def"
+                #undef MEASUREMENT_FIELD
+                
+                PyList_SetItem(tuple_list, i, tuple);
+            }
         }
         
         // Get only new mappings for database insertion
@@ -409,11 +625,17 @@ static PyObject* process_stdf_with_database_mappings(PyObject* self, PyObject* a
         // Create result dictionary
         PyObject* result_dict = PyDict_New();
         if (!result_dict) {
-            Py_DECREF(tuple_list);
+            Py_XDECREF(tuple_list);
+            Py_XDECREF(column_dict);
             return nullptr;
         }
         
-        PyDict_SetItemString(result_dict, "measurement_tuples", tuple_list);
+        if (columnar) {
+            PyDict_SetItemString(result_dict, "measurement_columns", column_dict);
+            Py_DECREF(column_dict);
+        } else {
+            PyDict_SetItemString(result_dict, "measurement_tuples", tuple_list);
+        }
         PyDict_SetItemString(result_dict, "total_records", 
                            PyLong_FromSize_t(processor.get_total_records()));
         PyDict_SetItemString(result_dict, "total_measurements", 
@@ -454,12 +676,16 @@ static PyObject* process_stdf_with_database_mappings(PyObject* self, PyObject* a
 static PyMethodDef StdfParserMethods[] = {
     {"parse_stdf_file", parse_stdf_file, METH_VARARGS,
      "Parse STDF file and return list of records"},
+    {"parse_stdf_file_columnar", parse_stdf_file_columnar, METH_VARARGS,
+     "Parse STDF file and return records as per-field columns"},
+    {"count_record_types", count_record_types, METH_VARARGS,
+     "Parse STDF file and return per-type record counts only"},
     {"precompute_measurement_fields", precompute_measurement_fields, METH_VARARGS,
      "Pre-compute expensive measurement fields in C++"},
     {"process_stdf_to_clickhouse_tuples", process_stdf_to_clickhouse_tuples, METH_VARARGS,
      "🚀 ULTRA-FAST: Process STDF to ClickHouse tuples entirely in C++"},
     {"process_stdf_with_database_mappings", process_stdf_with_database_mappings, METH_VARARGS,
-     "🔧 DATABASE-AWARE: Process STDF with existing database mappings and optional file hash"},
+     "🔧 DATABASE-AWARE: Process STDF with existing database mappings, optional file hash and optional columnar output"},
     {"get_version", get_version, METH_NOARGS,
      "Get version information"},
     {nullptr, nullptr, 0, nullptr}
@@ -4,6 +4,7 @@
 #include <fstream>
 #include <cstring>
 #include <algorithm>
+#include <array>
 
 // libstdf headers
 #include <libstdf.h>
@@ -11,6 +12,25 @@
 // Global shared DynamicFieldExtractor (created once, reused everywhere)
 static DynamicFieldExtractor g_field_extractor;
 
+// (REC_TYP << 8 | REC_SUB) -> STDFRecordType, filled once at load time so
+// get_record_type() is a single table load per record instead of a compare ladder
+static const std::array<uint8_t, 1 << 16> g_record_type_table = [] {
+    std::array<uint8_t, 1 << 16> table;
+    table.fill(static_cast<uint8_t>(STDFRecordType::UNKNOWN));
+    auto set = [&table](uint8_t rec_typ, uint8_t rec_sub, STDFRecordType type) {
+        table[(rec_typ << 8) | rec_sub] = static_cast<uint8_t>(type);
+    };
+    // STDF V4 record type mapping (corrected per libstdf specification)
+    set(15, 10, STDFRecordType::PTR);  // Parametric Test Record (REC_SUB_PTR = 10)
+    set(15, 15, STDFRecordType::MPR);  // Multiple-Result Parametric Record (REC_SUB_MPR = 15)
+    set(15, 20, STDFRecordType::FTR);  // Functional Test Record (REC_SUB_FTR = 20)
+    set(1, 40, STDFRecordType::HBR);   // Hardware Bin Record
+    set(1, 50, STDFRecordType::SBR);   // Software Bin Record
+    set(5, 20, STDFRecordType::PRR);   // Part Result Record
+    set(1, 10, STDFRecordType::MIR);   // Master Information Record
+    return table;
+}();
+
 STDFParser::STDFParser() 
     : stdf_file_handle_(nullptr)
     , total_records_(0)
@@ -185,16 +205,7 @@ void STDFParser::close_stdf_file() {
 }
 
 STDFRecordType STDFParser::get_record_type(uint8_t rec_typ, uint8_t rec_sub) {
-    // STDF V4 record type mapping (corrected per libstdf specification)
-    if (rec_typ == 15 && rec_sub == 10) return STDFRecordType::PTR;  // Parametric Test Record (REC_SUB_PTR = 10)
-    if (rec_typ == 15 && rec_sub == 15) return STDFRecordType::MPR;  // Multiple-Result Parametric Record (REC_SUB_MPR = 15)
-    if (rec_typ == 15 && rec_sub == 20) return STDFRecordType::FTR;  // Functional Test Record (REC_SUB_FTR = 20)
-    if (rec_typ == 1 && rec_sub == 40)  return STDFRecordType::HBR;  // Hardware Bin Record
-    if (rec_typ == 1 && rec_sub == 50)  return STDFRecordType::SBR;  // Software Bin Record
-    if (rec_typ == 5 && rec_sub == 20)  return STDFRecordType::PRR;  // Part Result Record
-    if (rec_typ == 1 && rec_sub == 10)  return STDFRecordType::MIR;  // Master Information Record
-    
-    return STDFRecordType::UNKNOWN;
+    return static_cast<STDFRecordType>(g_record_type_table[(rec_typ << 8) | rec_sub]);
 }
 
 std::string STDFParser::extract_string_field(const char* field, size_t max_len) {
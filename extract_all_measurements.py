@@ -9,8 +9,14 @@ Extracts ALL measurements, especially pixel tests, with no file saving overhead.
 
 import os
 import platform
+import sys
 import time
 import re
+from array import array
+from collections import Counter, defaultdict
+from itertools import count
+
+import numpy as np
 
 # Platform setup for C++ library
 system = platform.system().lower()
@@ -27,14 +33,140 @@ except ImportError as e:
     print(f"❌ C++ parser not available: {e}")
     exit(1)
 
+# Precompiled pixel patterns (these run once per test record)
+_PIXEL_RE = re.compile(r'Pixel=R(\d+)C(\d+)')
+_PIXEL_SUFFIX_RE = re.compile(r';Pixel=R\d+C\d+')
+_PIXEL_PREFIX_RE = re.compile(r'^Pixel=R\d+C\d+;')
+
+# Record types _extract_from_records reads; rows of any other type are never bucketed
+_EXTRACTED_RECORD_TYPES = frozenset(['MIR', 'PRR', 'MPR', 'PTR', 'FTR', 'SBR', 'HBR'])
+
+
+def _records_to_columns(records):
+    """Columnar layout of parse_stdf_file records, for builds without parse_stdf_file_columnar"""
+    fields = {}
+    for row, record in enumerate(records):
+        for name, value in record.get('fields', {}).items():
+            column = fields.get(name)
+            if column is None:
+                column = fields[name] = [None] * len(records)
+            column[row] = value
+    return {'record_type': [record.get('record_type', 'UNKNOWN') for record in records], 'fields': fields}
+
+
+def _column_record(columns, row):
+    """Rebuild one record dict (record_type + fields) from the columnar layout"""
+    fields = {}
+    for name, column in columns['fields'].items():
+        if column[row] is not None:
+            fields[name] = column[row]
+    return {'record_type': columns['record_type'][row], 'fields': fields}
+
+
+def _column_values(columns, name, rows, default):
+    """Values of one field for the given rows; default where the record doesn't carry it"""
+    column = columns['fields'].get(name)
+    if column is None:
+        return [default] * len(rows)
+    return [default if value is None else value for value in map(column.__getitem__, rows)]
+
+
+class MeasurementStore:
+    """Columnar (struct-of-arrays) measurement store
+    
+    One typed array per per-measurement column; test- and device-level fields live once in
+    the tests/devices tables and are referenced by index. Indexing or iterating yields the
+    same measurement dicts the extractor used to keep in a list.
+    """
+    
+    def __init__(self):
+        self.value = array('d')
+        self.pos_x = array('i')
+        self.pos_y = array('i')
+        self.test_id = array('i')       # index into self.tests
+        self.device_index = array('i')  # index into self.devices
+        self.tests = []    # (param_name, param_id, test_num, test_flg, record_type)
+        self.devices = []  # (device_id, precomputed_fields), one entry per PRR
+    
+    def __len__(self):
+        return len(self.value)
+    
+    def __iter__(self):
+        tests = self.tests
+        devices = self.devices
+        for value, pos_x, pos_y, test_id, device_index in zip(
+                self.value, self.pos_x, self.pos_y, self.test_id, self.device_index):
+            yield self._build(value, pos_x, pos_y, tests[test_id], devices[device_index])
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._build(self.value[index], self.pos_x[index], self.pos_y[index],
+                           self.tests[self.test_id[index]], self.devices[self.device_index[index]])
+    
+    def add_device_block(self, device_id, precomputed_fields, values, test_ids, pos_x, pos_y):
+        """Append one device's measurements; the column arrays are copied in bulk"""
+        self.devices.append((device_id, precomputed_fields))
+        self.value.extend(values)
+        self.test_id.extend(test_ids)
+        self.pos_x.extend(pos_x)
+        self.pos_y.extend(pos_y)
+        self.device_index.extend(array('i', [len(self.devices) - 1]) * len(values))
+    
+    def to_dataframe(self):
+        """Per-measurement columns as a pandas DataFrame (no dict per row)
+        
+        Test-level strings become categoricals; device-level fields stay in self.devices.
+        """
+        import pandas as pd
+        
+        test_id = np.array(self.test_id, dtype=np.intp)
+        device_index = np.array(self.device_index, dtype=np.intp)
+        param_names, param_ids, test_nums, test_flgs, record_types = (
+            zip(*self.tests) if self.tests else ((), (), (), (), ()))
+        
+        def per_row(per_test_values):
+            per_test = pd.Categorical(per_test_values)
+            return pd.Categorical.from_codes(per_test.codes[test_id], per_test.categories)
+        
+        return pd.DataFrame({
+            'WTP_PARAM_NAME': per_row(param_names),
+            'WPTM_VALUE': np.array(self.value, dtype=np.float64),
+            'WP_POS_X': np.array(self.pos_x, dtype=np.int32),
+            'WP_POS_Y': np.array(self.pos_y, dtype=np.int32),
+            'WTP_ID': np.array(param_ids, dtype=np.int64)[test_id],
+            'WLD_ID': np.array([device_id for device_id, _ in self.devices], dtype=np.int64)[device_index],
+            'TEST_NUM': per_row(test_nums),
+            'TEST_FLG': per_row(test_flgs),
+            'RECORD_TYPE': per_row(record_types),
+        })
+    
+    @staticmethod
+    def _build(value, pos_x, pos_y, test, device):
+        param_name, param_id, test_num, test_flg, record_type = test
+        device_id, precomputed_fields = device
+        return {
+            'WTP_PARAM_NAME': param_name,
+            'WPTM_VALUE': value,
+            'WP_POS_X': pos_x,
+            'WP_POS_Y': pos_y,
+            'WTP_ID': param_id,
+            'WLD_ID': device_id,
+            'TEST_NUM': test_num,
+            'TEST_FLG': test_flg,
+            'RECORD_TYPE': record_type,
+            **precomputed_fields
+        }
+
 
 class MeasurementExtractor:
     """Simple measurement extractor focused on pixel tests"""
     
-    def __init__(self):
-        self.measurements = []
+    def __init__(self, verbose=False):
+        self.measurements = MeasurementStore()
+        self.verbose = verbose  # print one progress line per device
         self.devices = {}
-        self.parameters = {}
+        self.parameters = defaultdict(count().__next__)  # name -> id, assigned on first lookup
         # Debug counters
         self.debug_comma_tests = 0
         self.debug_single_tests = 0
@@ -44,27 +176,11 @@ class MeasurementExtractor:
         print(f"🔄 Processing: {os.path.basename(stdf_file_path)}")
         
         start_time = time.time()
-        
-        # Parse with C++ - get ALL records with ALL fields
-        result = stdf_parser_cpp.parse_stdf_file(stdf_file_path)
-        records = result.get('records', [])
-        
-        cpp_time = time.time() - start_time
-        print(f"⚡ C++ parsed {len(records):,} records in {cpp_time:.2f}s")
-        
-        # Group records by type
-        record_types = {}
-        for record in records:
-            rtype = record.get('record_type', 'UNKNOWN')
-            if rtype not in record_types:
-                record_types[rtype] = []
-            record_types[rtype].append(record)
-        
-        print(f"📊 Record types: {list(record_types.keys())}")
+        columns, record_types = self._parse_columns(stdf_file_path)
         
         # Extract measurements from test records
         measurement_start = time.time()
-        self._extract_from_records(record_types)
+        self._extract_from_records(columns, record_types)
         measurement_time = time.time() - measurement_start
         
         total_time = time.time() - start_time
@@ -73,14 +189,62 @@ class MeasurementExtractor:
         
         return self.measurements
     
-    def _extract_from_records(self, record_types):
-        """Extract measurements from parsed records using CROSS-PRODUCT logic"""
+    def iter_measurements(self, stdf_file_path):
+        """Yield measurement dicts device by device without keeping them in self.measurements
+        
+        The parsed records are still held in memory; only the measurement rows are streamed.
+        """
+        print(f"🔄 Processing: {os.path.basename(stdf_file_path)}")
+        
+        columns, record_types = self._parse_columns(stdf_file_path)
+        tests = self.measurements.tests
+        for device_id, precomputed_fields, values, test_ids, pos_x, pos_y in self._iter_device_blocks(columns, record_types):
+            device = (device_id, precomputed_fields)
+            for value, x, y, test_id in zip(values, pos_x, pos_y, test_ids):
+                yield MeasurementStore._build(value, x, y, tests[test_id], device)
+    
+    def _parse_columns(self, stdf_file_path):
+        """Parse with C++ and group row numbers by record type; returns (columns, record_types)"""
+        start_time = time.time()
+        
+        # Parse with C++ - get ALL records with ALL fields, as one list per field
+        if hasattr(stdf_parser_cpp, 'parse_stdf_file_columnar'):
+            columns = stdf_parser_cpp.parse_stdf_file_columnar(stdf_file_path)
+        else:
+            columns = _records_to_columns(stdf_parser_cpp.parse_stdf_file(stdf_file_path).get('records', []))
+        record_type_column = columns['record_type']
+        
+        cpp_time = time.time() - start_time
+        print(f"⚡ C++ parsed {len(record_type_column):,} records in {cpp_time:.2f}s")
+        
+        # Group row numbers by record type (first-seen order), only for the types we extract from
+        seen_types = list(dict.fromkeys(record_type_column))
+        type_array = np.array(record_type_column, dtype=object)
+        record_types = {rtype: np.flatnonzero(type_array == rtype)
+                        for rtype in seen_types if rtype in _EXTRACTED_RECORD_TYPES}
+        
+        print(f"📊 Record types: {seen_types}")
+        
+        return columns, record_types
+    
+    def _extract_from_records(self, columns, record_types):
+        """Extract measurements from parsed records into self.measurements"""
+        for block in self._iter_device_blocks(columns, record_types):
+            self.measurements.add_device_block(*block)
+    
+    def _iter_device_blocks(self, columns, record_types):
+        """Yield one block of measurement columns per device using CROSS-PRODUCT logic
+        
+        columns is the parse_stdf_file_columnar layout; record_types maps each record type
+        to its row numbers in it. Each block is (device_id, precomputed_fields, values,
+        test_ids, pos_x, pos_y) with test_ids indexing self.measurements.tests.
+        """
         
         # Get MIR info for context
-        mir_info = self._get_mir_info(record_types.get('MIR', []))
+        mir_info = self._get_mir_info([_column_record(columns, row) for row in record_types.get('MIR', [])])
         
         # Extract PRR records (device information) - following original logic
-        prr_records = record_types.get('PRR', [])
+        prr_records = [_column_record(columns, row) for row in record_types.get('PRR', [])]
         if not prr_records:
             print("❌ No PRR records found - cannot create measurements")
             return
@@ -89,24 +253,71 @@ class MeasurementExtractor:
         
         # Get ALL test records - CRITICAL: Original processes MPR and PTR separately!
         # From uvicorn output: "Processing 92772 MPR records" (per device)
-        test_records = []
+        test_rows = []
         
         # Original processes these record types
         for record_type in ['MPR', 'PTR']:  # Focus on main test records like original
             if record_type in record_types:
-                test_records.extend(record_types[record_type])
+                test_rows.extend(record_types[record_type].tolist())
                 print(f"📊 Found {len(record_types[record_type]):,} {record_type} records")
         
         # Also include other test record types if available
         for record_type in ['FTR', 'SBR', 'HBR']:
             if record_type in record_types:
-                test_records.extend(record_types[record_type])
+                test_rows.extend(record_types[record_type].tolist())
                 print(f"📊 Found {len(record_types[record_type]):,} {record_type} records")
         
-        print(f"🧪 Total test records to process: {len(test_records):,}")
-        print(f"🔄 Cross-product calculation: {len(prr_records)} devices × {len(test_records):,} tests = {len(prr_records) * len(test_records):,} base operations")
+        print(f"🧪 Total test records to process: {len(test_rows):,}")
+        
+        # CRITICAL: Original DOES filter for pixel tests! (line 516 in STDF_Parser_CH.py)
+        # The filter only looks at the test itself, so run it once here instead of once per device
+        alarm_ids = _column_values(columns, 'ALARM_ID', test_rows, '')
+        test_txts = _column_values(columns, 'TEST_TXT', test_rows, '')
+        pixel_rows = [row for row, alarm_id, test_txt in zip(test_rows, alarm_ids, test_txts)
+                      if self._is_pixel_test(alarm_id, test_txt)]
+        print(f"🎯 Pixel tests: {len(pixel_rows):,} of {len(test_rows):,}")
+        
+        # Pull the remaining test fields column by column for the pixel tests only
+        pixel_tests = list(zip(
+            [columns['record_type'][row] for row in pixel_rows],
+            _column_values(columns, 'ALARM_ID', pixel_rows, ''),
+            _column_values(columns, 'TEST_TXT', pixel_rows, ''),
+            _column_values(columns, 'TEST_NUM', pixel_rows, ''),
+            _column_values(columns, 'TEST_FLG', pixel_rows, ''),
+            _column_values(columns, 'RESULT', pixel_rows, '0'),
+            _column_values(columns, 'RTN_RSLT', pixel_rows, ''),
+            _column_values(columns, 'RSLT_CNT', pixel_rows, ''),
+        ))
+        
+        print(f"🔄 Cross-product calculation: {len(prr_records)} devices × {len(pixel_tests):,} pixel tests = {len(prr_records) * len(pixel_tests):,} base operations")
         print(f"📈 Each test can create multiple measurements from comma-separated values in TEST_TXT")
         
+        # Everything that depends only on the test is resolved once, not once per device
+        precomputed_tests = self._precompute_tests(pixel_tests)
+        comma_tests = sum(1 for test in precomputed_tests if len(test[4]) > 1)
+        single_tests = len(precomputed_tests) - comma_tests
+        
+        # Every device emits the same block of rows; only the device fields and the default
+        # coordinates of tests without Pixel=R##C## differ, so build the block once
+        test_base = len(self.measurements.tests)
+        block_values = array('d')
+        block_test_ids = array('i')
+        block_x = array('i')
+        block_y = array('i')
+        missing_x = []
+        missing_y = []
+        for offset, (cleaned_param_name, param_id, test_x, test_y, measurement_values, test_num, test_flg, record_type) in enumerate(precomputed_tests):
+            self.measurements.tests.append((cleaned_param_name, param_id, test_num, test_flg, record_type))
+            rows = range(len(block_values), len(block_values) + len(measurement_values))
+            if test_x is None:
+                missing_x.extend(rows)
+            if test_y is None:
+                missing_y.extend(rows)
+            block_values.extend(measurement_values)
+            block_test_ids.extend([test_base + offset] * len(rows))
+            block_x.extend([0 if test_x is None else test_x] * len(rows))
+            block_y.extend([0 if test_y is None else test_y] * len(rows))
+        
         # CROSS-PRODUCT LOGIC: For each device, process ALL test records
         processed_devices = 0
         total_measurements_created = 0
@@ -135,21 +346,36 @@ class MeasurementExtractor:
                 'default_y_pos': default_y_pos
             }
             
-            device_measurements_before = len(self.measurements)
+            # Device-level fields only depend on MIR + PRR, so compute them once per device
+            precomputed_fields = self._precompute_device_fields(mir_info, prr_data, processed_devices == 0)
+            
+            # Emit EVERY pixel test for THIS device (cross-product logic)
+            device_x = block_x
+            if missing_x:
+                device_x = array('i', block_x)
+                for row in missing_x:
+                    device_x[row] = default_x_pos
+            device_y = block_y
+            if missing_y:
+                device_y = array('i', block_y)
+                for row in missing_y:
+                    device_y[row] = default_y_pos
+            yield device_id, precomputed_fields, block_values, block_test_ids, device_x, device_y
             
-            # Process EVERY test record for THIS device (cross-product logic)
-            for test in test_records:
-                self._process_single_test(test, prr_data, mir_info)
+            self.debug_comma_tests += comma_tests
+            self.debug_single_tests += single_tests
             
-            device_measurements_created = len(self.measurements) - device_measurements_before
+            device_measurements_created = len(block_values)
             total_measurements_created += device_measurements_created
             processed_devices += 1
             
-            if device_measurements_created > 0:
-                avg_per_test = device_measurements_created / len(test_records) if test_records else 0
-                print(f"  Device {processed_devices}/{len(prr_records)}: {device_dmc} → {device_measurements_created:,} measurements (avg {avg_per_test:.1f} per test)")
-            else:
-                print(f"  Device {processed_devices}/{len(prr_records)}: {device_dmc} → 0 measurements")
+            # Per-device progress only on request - thousands of devices make this the bulk of the output
+            if self.verbose:
+                if device_measurements_created > 0:
+                    avg_per_test = device_measurements_created / len(test_rows) if test_rows else 0
+                    print(f"  Device {processed_devices}/{len(prr_records)}: {device_dmc} → {device_measurements_created:,} measurements (avg {avg_per_test:.1f} per test)")
+                else:
+                    print(f"  Device {processed_devices}/{len(prr_records)}: {device_dmc} → 0 measurements")
         
         print(f"✅ Cross-product processing completed:")
         print(f"   📊 Processed {processed_devices} devices")
@@ -173,95 +399,88 @@ class MeasurementExtractor:
             'start_time': mir_fields.get('START_T', '')
         }
     
-    def _process_single_test(self, test_record, prr_data, mir_info):
-        """Process a single test record with device context (EXACT STDF_Parser_CH logic)"""
-        test_fields = test_record.get('fields', {})
-        
-        # Extract test data from C++ extraction (use ALARM_ID as param_name like original)
-        param_name = test_fields.get('ALARM_ID', '')  # Original uses ALARM_ID as param_name
-        test_txt = test_fields.get('TEST_TXT', '')
-        test_num = test_fields.get('TEST_NUM', '')
-        test_flg = test_fields.get('TEST_FLG', '')
-        result_value = test_fields.get('RESULT', '0')
-        units = test_fields.get('UNITS', '')
-        head_num = test_fields.get('HEAD_NUM', '')
-        site_num = test_fields.get('SITE_NUM', '')
-        
-        # CRITICAL: Original DOES filter for pixel tests! (line 516 in STDF_Parser_CH.py)
-        # Skip if not a pixel test (following original logic exactly)
-        if not self._is_pixel_test(param_name, test_txt):
-            return  # Exit early like original
-        
-        # We know this is a pixel test (passed filter above)
-        is_pixel = True
-        
-        # Extract coordinates (following original _extract_test_coordinates)
-        pixel_x, pixel_y = self._extract_test_coordinates(
-            param_name, test_txt, prr_data['default_x_pos'], prr_data['default_y_pos']
-        )
-        
-        # Clean parameter name (following original logic)
-        cleaned_param_name = self._clean_param_name(param_name)
-        param_id = len(self.parameters)
-        if cleaned_param_name not in self.parameters:
-            self.parameters[cleaned_param_name] = param_id
-        else:
+    def _precompute_tests(self, pixel_tests):
+        """Resolve the device-independent part of every pixel test once (EXACT STDF_Parser_CH logic)
+        
+        pixel_tests holds (record_type, alarm_id, test_txt, test_num, test_flg, result, rtn_rslt,
+        rslt_cnt) tuples, one per pixel test.
+        Returns a list of (cleaned_param_name, param_id, pixel_x, pixel_y, measurement_values,
+        test_num, test_flg, record_type) tuples; pixel_x/pixel_y are None when the test carries
+        no Pixel=R##C## coordinates and the device's PRR position should be used instead.
+        """
+        precomputed_tests = []
+        multi_value_tests = 0
+        
+        for test_index, test in enumerate(pixel_tests):
+            # Test data from C++ extraction (use ALARM_ID as param_name like original)
+            record_type, param_name, test_txt, test_num, test_flg, result_value, rtn_rslt, rslt_cnt = test
+            
+            # Extract coordinates (following original _extract_test_coordinates); defaults come per device
+            pixel_x, pixel_y = self._extract_test_coordinates(param_name, test_txt, None, None)
+            
+            # Clean parameter name (following original logic)
+            cleaned_param_name = self._clean_param_name(param_name)
             param_id = self.parameters[cleaned_param_name]
-        
-        # DEBUG: Print RTN_RSLT values to see what they contain
-        rtn_rslt = test_fields.get('RTN_RSLT', '')
-        rslt_cnt = test_fields.get('RSLT_CNT', '')
-        
-        if self.debug_comma_tests + self.debug_single_tests < 5:  # First 5 tests
-            print(f"DEBUG Test #{self.debug_comma_tests + self.debug_single_tests + 1}:")
-            print(f"  RECORD_TYPE: {test_record.get('record_type')}")
-            print(f"  TEST_TXT: {test_txt[:80]}...")
-            print(f"  RTN_RSLT: {rtn_rslt}")
-            print(f"  RSLT_CNT: {rslt_cnt}")
-            print(f"  RESULT: {result_value}")
-        
-        # Handle MPR RTN_RSLT arrays - now with real comma-separated values!
-        if test_record.get('record_type') == 'MPR' and rtn_rslt and rtn_rslt != '[float_array]':
-            # MPR with actual RTN_RSLT comma-separated values
-            if ',' in rtn_rslt:
-                # Parse the comma-separated RTN_RSLT values
-                rtn_values = self._parse_test_values(rtn_rslt)
-                measurement_values = [self._safe_float(val) for val in rtn_values]
-                if self.debug_comma_tests + self.debug_single_tests < 3:
-                    print(f"DEBUG: MPR with comma-separated RTN_RSLT: {rtn_rslt[:50]}...")
-                    print(f"DEBUG: Parsed {len(measurement_values)} values: {measurement_values[:5]}...")
+            
+            # DEBUG: Print RTN_RSLT values to see what they contain
+            if test_index < 5:  # First 5 tests
+                print(f"DEBUG Test #{test_index + 1}:")
+                print(f"  RECORD_TYPE: {record_type}")
+                print(f"  TEST_TXT: {test_txt[:80]}...")
+                print(f"  RTN_RSLT: {rtn_rslt}")
+                print(f"  RSLT_CNT: {rslt_cnt}")
+                print(f"  RESULT: {result_value}")
+            
+            # Handle MPR RTN_RSLT arrays - now with real comma-separated values!
+            if record_type == 'MPR' and rtn_rslt and rtn_rslt != '[float_array]':
+                # MPR with actual RTN_RSLT comma-separated values
+                if ',' in rtn_rslt:
+                    # Parse the comma-separated RTN_RSLT values; float() ignores surrounding
+                    # whitespace, so the strip/filter pass is only needed for empty fields
+                    try:
+                        measurement_values = list(map(float, rtn_rslt.split(',')))
+                    except ValueError:
+                        measurement_values = self._bulk_float(self._parse_test_values(rtn_rslt))
+                    if test_index < 3:
+                        print(f"DEBUG: MPR with comma-separated RTN_RSLT: {rtn_rslt[:50]}...")
+                        print(f"DEBUG: Parsed {len(measurement_values)} values: {measurement_values[:5]}...")
+                else:
+                    # Single RTN_RSLT value
+                    measurement_values = [self._safe_float(rtn_rslt)]
+            elif ',' not in test_txt:
+                # Single TEST_TXT value (empty parses as '0.0') - skip the split and the lists
+                measurement_values = (self._safe_float(test_txt) if test_txt else 0.0,)
             else:
-                # Single RTN_RSLT value
-                measurement_values = [self._safe_float(rtn_rslt)]
-        else:
-            # For PTR/FTR or no array - use single result or TEST_TXT comma parsing
-            test_values = self._parse_test_values(test_txt)
-            measurement_values = [(self._safe_float(value) if value else self._safe_float(result_value)) for value in test_values]
-        
-        # DEBUG: Check for multiple measurements
-        if len(measurement_values) > 1:
-            self.debug_comma_tests += 1
-            if self.debug_comma_tests <= 3:  # Only print first 3 examples
-                print(f"DEBUG: Found {len(measurement_values)} measurement values!")
-                print(f"DEBUG: Values: {measurement_values[:5]}...")  # Show first 5 values
-        else:
-            self.debug_single_tests += 1
+                # For PTR/FTR or no array - use TEST_TXT comma parsing
+                test_values = self._parse_test_values(test_txt)
+                measurement_values = self._bulk_float([value or result_value for value in test_values])
+            
+            # DEBUG: Check for multiple measurements
+            if len(measurement_values) > 1:
+                multi_value_tests += 1
+                if multi_value_tests <= 3:  # Only print first 3 examples
+                    print(f"DEBUG: Found {len(measurement_values)} measurement values!")
+                    print(f"DEBUG: Values: {measurement_values[:5]}...")  # Show first 5 values
+            
+            precomputed_tests.append((
+                cleaned_param_name, param_id, pixel_x, pixel_y, measurement_values,
+                test_num, test_flg, 'MPR' if record_type is None else record_type
+            ))
         
-        # OPTION 1: Pre-compute expensive fields in C++ (computed ONCE per test, not per measurement)
+        return precomputed_tests
+    
+    def _precompute_device_fields(self, mir_info, prr_data, verbose=False):
+        """Fields shared by every measurement of one device (C++ pre-computation, Python fallback)"""
         try:
-            import stdf_parser_cpp
-            
-            # C++ pre-computes all expensive fields ONCE per test (not 10 times per measurement)
             precomputed_fields = stdf_parser_cpp.precompute_measurement_fields(mir_info, prr_data)
-            
-            # Success indicator (only show for first few tests)
-            if self.debug_comma_tests + self.debug_single_tests < 3:
-                print(f"✅ Using C++ pre-computation for test #{self.debug_comma_tests + self.debug_single_tests + 1}")
+            if verbose:
+                print(f"✅ Using C++ pre-computation for device fields")
+            return precomputed_fields
             
         except Exception as e:
             # Fallback: compute in Python if C++ fails
             print(f"⚠️ Warning: C++ precompute failed ({e}), using Python fallback computation")
-            precomputed_fields = {
+            return {
                 'WFI_FACILITY': mir_info.get('facility', ''),
                 'WFI_OPERATION': mir_info.get('operation', ''),
                 'WL_LOT_NAME': mir_info.get('lot_name', ''),
@@ -279,27 +498,6 @@ class MeasurementExtractor:
                 'TEST_FLAG': prr_data['bin_code'] and prr_data['bin_code'].isdigit() and int(prr_data['bin_code']) == 1,
                 'WLD_CREATED_DATE': mir_info.get('start_time', ''),
             }
-
-        # Create measurements for EACH value/result using pre-computed fields
-        for i, float_value in enumerate(measurement_values):
-            # Python assembles measurement object using C++ pre-computed fields (FAST!)
-            measurement = {
-                # Fields that change per measurement:
-                'WTP_PARAM_NAME': cleaned_param_name,
-                'WPTM_VALUE': float_value,
-                'WP_POS_X': pixel_x,
-                'WP_POS_Y': pixel_y,
-                'WTP_ID': param_id,
-                'WLD_ID': prr_data['device_id'],
-                'TEST_NUM': test_num,
-                'TEST_FLG': test_flg,
-                'RECORD_TYPE': test_record.get('record_type', 'MPR'),
-                
-                # Pre-computed fields (same for all 10 measurements from this test):
-                **precomputed_fields  # Python dict unpacking - very fast!
-            }
-            
-            self.measurements.append(measurement)
     
     def _extract_pixel_coords(self, alarm_id, test_txt):
         """Extract pixel coordinates from ALARM_ID or TEST_TXT"""
@@ -316,7 +514,7 @@ class MeasurementExtractor:
         if not text or 'Pixel=' not in text:
             return None, None
         
-        match = re.search(r'Pixel=R(\d+)C(\d+)', text)
+        match = _PIXEL_RE.search(text)
         if match:
             row = int(match.group(1))  # R = Row = Y
             col = int(match.group(2))  # C = Column = X  
@@ -338,12 +536,12 @@ class MeasurementExtractor:
     
     def _clean_param_name(self, param_name):
         """Clean parameter name by removing pixel patterns (following original logic)"""
-        if not param_name:
+        if not param_name or 'Pixel=' not in param_name:
             return param_name
         
         # Remove Pixel=R##C## patterns
-        cleaned = re.sub(r';Pixel=R\d+C\d+', '', param_name)
-        cleaned = re.sub(r'^Pixel=R\d+C\d+;', '', cleaned)
+        cleaned = _PIXEL_SUFFIX_RE.sub('', param_name)
+        cleaned = _PIXEL_PREFIX_RE.sub('', cleaned)
         return cleaned
     
     def _parse_test_values(self, test_txt):
@@ -375,6 +573,14 @@ class MeasurementExtractor:
         except (ValueError, TypeError):
             return 0.0
     
+    def _bulk_float(self, values):
+        """Convert a list of value strings to floats; same results as _safe_float per value"""
+        try:
+            return list(map(float, values))
+        except (ValueError, TypeError):
+            # Some value is empty or not numeric - take the per-value path for this list
+            return [self._safe_float(value) for value in values]
+    
     def _safe_int(self, value):
         """Safely convert to int"""
         try:
@@ -408,15 +614,18 @@ class MeasurementExtractor:
             return
         
         total = len(self.measurements)
-        ptr_tests = sum(1 for m in self.measurements if m['RECORD_TYPE'] == 'PTR')
-        mpr_tests = sum(1 for m in self.measurements if m['RECORD_TYPE'] == 'MPR')
-        ftr_tests = sum(1 for m in self.measurements if m['RECORD_TYPE'] == 'FTR')
         
-        # Test flag statistics
-        test_flg_counts = {}
-        for m in self.measurements:
-            flg = m['TEST_FLG']
-            test_flg_counts[flg] = test_flg_counts.get(flg, 0) + 1
+        # Count rows per test id in one pass, then fold the per-test counts by record type and flag
+        per_test = np.bincount(np.frombuffer(self.measurements.test_id, dtype=np.intc),
+                               minlength=len(self.measurements.tests))
+        record_type_counts = Counter()
+        test_flg_counts = Counter()
+        for (_, _, _, flg, record_type), rows in zip(self.measurements.tests, per_test.tolist()):
+            record_type_counts[record_type] += rows
+            test_flg_counts[flg] += rows
+        ptr_tests = record_type_counts['PTR']
+        mpr_tests = record_type_counts['MPR']
+        ftr_tests = record_type_counts['FTR']
         
         print(f"\n📈 MEASUREMENT STATISTICS:")
         print("=" * 50)
@@ -429,8 +638,8 @@ class MeasurementExtractor:
             print(f"  TEST_FLG='{flg}':     {count:,}")
 
 
-def main():
-    """Main function to extract all measurements"""
+def main(verbose=False):
+    """Main function to extract all measurements (verbose: print a line per device)"""
     print("🚀 Extract ALL Measurements - C++ Edition")
     print("=" * 50)
     
@@ -450,7 +659,7 @@ def main():
     print(f"📁 Processing: {test_file}")
     
     # Extract measurements
-    extractor = MeasurementExtractor()
+    extractor = MeasurementExtractor(verbose=verbose)
     measurements = extractor.extract_measurements(test_file)
     
     # Print results
@@ -458,12 +667,13 @@ def main():
     extractor.print_sample_measurements()
     
     # Show original test_flg issue resolution
-    test_flg_measurements = [m for m in measurements if m['TEST_FLG'] and m['TEST_FLG'] != '0']
+    measurement_frame = measurements.to_dataframe()
+    flagged = measurement_frame[~measurement_frame['TEST_FLG'].isin(['', '0'])]
     print(f"\n🎯 ORIGINAL ISSUE RESOLUTION:")
     print(f"Successfully extracted {len(measurements):,} total measurements with proper TEST_FLG values")
     
-    if test_flg_measurements:
-        example = test_flg_measurements[0]
+    if len(flagged):
+        example = flagged.iloc[0]
         print(f"Example non-zero TEST_FLG: '{example['TEST_FLG']}', PARAM='{example['WTP_PARAM_NAME'][:50]}...'")
     
     print(f"\n✅ Your original test_flg extraction issue is SOLVED!")
@@ -471,4 +681,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(verbose='--verbose' in sys.argv[1:])
\ No newline at end of file
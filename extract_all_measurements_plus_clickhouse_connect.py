@@ -22,6 +22,8 @@ import time
 import argparse
 import sys
 import hashlib
+import re
+from functools import lru_cache
 from datetime import datetime
 
 # Platform setup for C++ library
@@ -39,6 +41,17 @@ except ImportError as e:
     print(f"❌ C++ parser not available: {e}")
     exit(1)
 
+# Precompiled pixel patterns (these run once per test record)
+_PIXEL_RE = re.compile(r'Pixel=R(\d+)C(\d+)')
+_PIXEL_SUFFIX_RE = re.compile(r';Pixel=R\d+C\d+')
+_PIXEL_PREFIX_RE = re.compile(r'^Pixel=R\d+C\d+;')
+
+
+@lru_cache(maxsize=4096)
+def _strip_pixel_from_param(param_name):
+    """Remove Pixel=R##C## from a parameter name (same names repeat for every device)"""
+    return _PIXEL_PREFIX_RE.sub('', _PIXEL_SUFFIX_RE.sub('', param_name))
+
 # Import ClickHouse integration using clickhouse-driver (fast native TCP)
 try:
     from clickhouse_driver import Client
@@ -81,6 +94,14 @@ class STDFProcessor:
         self.param_counter = 0
         self.current_file_hash = None  # For deduplication
         
+        # New mappings awaiting insert, written in one block per table by flush_pending_mappings
+        self._pending_device_inserts = []  # (wld_id, wld_device_dmc)
+        self._pending_param_inserts = []   # (wtp_id, wtp_param_name)
+        
+        # Reused ClickHouse client for the small per-file lookups (dedup check, mapping load)
+        self._ch_client = None
+        self._ch_client_key = None
+        
         # Debug counters from original
         self.debug_comma_tests = 0
         self.debug_single_tests = 0
@@ -91,91 +112,148 @@ class STDFProcessor:
         print(f"   Platform: {platform.system()} ({platform.machine()})")
     
     def get_device_id(self, device_dmc, client=None):
-        """Get or create a consistent WLD_ID for a device DMC with database persistence"""
-        # First check if we already have a mapping in memory
+        """Get or create a consistent WLD_ID for a device DMC with database persistence
+        
+        Pure in-memory lookup: load existing database mappings for all names first with
+        one bulk _prefetch_ids call, or new IDs may duplicate names already stored.
+        With a client, new mappings are queued until flush_pending_mappings(client) runs
+        (push_to_clickhouse calls it before returning).
+        """
         if device_dmc in self.device_id_map:
             return self.device_id_map[device_dmc]
         
-        # If ClickHouse client exists, check if mapping exists in database
-        if client:
-            try:
-                # Use format() for clickhouse-connect parameter substitution
-                query = f"SELECT wld_id FROM device_mapping WHERE wld_device_dmc = '{device_dmc}'"
-                rows = client.execute(query)
-                if rows:
-                    wld_id = rows[0][0]
-                    self.device_id_map[device_dmc] = wld_id
-                    # Update counter to avoid ID conflicts
-                    if wld_id >= self.device_counter:
-                        self.device_counter = wld_id + 1
-                    return wld_id
-            except Exception as e:
-                print(f"⚠️ Error checking for existing device in ClickHouse: {e}")
-        
         # If we get here, no mapping exists - create new mapping
         new_wld_id = self.device_counter
         self.device_id_map[device_dmc] = new_wld_id
         self.device_counter += 1
         
-        # Insert new mapping to database if client available
+        # Queue the new mapping; it is inserted with the others in flush_pending_mappings
         if client:
-            try:
-                # Use format() for clickhouse-connect parameter substitution
-                query = f"INSERT INTO device_mapping (wld_id, wld_device_dmc) VALUES ({new_wld_id}, '{device_dmc}')"
-                client.execute(query)
-            except Exception as e:
-                print(f"⚠️ Error inserting device mapping to ClickHouse: {e}")
+            self._pending_device_inserts.append((new_wld_id, device_dmc))
+            if len(self._pending_device_inserts) >= self.batch_size:
+                self.flush_pending_mappings(client)
         
         return new_wld_id
     
     def get_param_id(self, param_name, client=None):
-        """Get or create a consistent WTP_ID for a parameter name with database persistence"""
-        # First check if we already have a mapping in memory
+        """Get or create a consistent WTP_ID for a parameter name with database persistence
+        
+        Pure in-memory lookup: load existing database mappings for all names first with
+        one bulk _prefetch_ids call, or new IDs may duplicate names already stored.
+        With a client, new mappings are queued until flush_pending_mappings(client) runs
+        (push_to_clickhouse calls it before returning).
+        """
         if param_name in self.param_id_map:
             return self.param_id_map[param_name]
         
-        # If ClickHouse client exists, check if mapping exists in database
-        if client:
-            try:
-                # Escape single quotes in parameter name for SQL safety
-                escaped_param_name = param_name.replace("'", "\\'")
-                query = f"SELECT wtp_id FROM parameter_info WHERE wtp_param_name = '{escaped_param_name}'"
-                rows = client.execute(query)
-                if rows:
-                    wtp_id = rows[0][0]
-                    self.param_id_map[param_name] = wtp_id
-                    # Update counter to avoid ID conflicts
-                    if wtp_id >= self.param_counter:
-                        self.param_counter = wtp_id + 1
-                    return wtp_id
-            except Exception as e:
-                print(f"⚠️ Error checking for existing parameter in ClickHouse: {e}")
-        
         # If we get here, no mapping exists - create new mapping
         new_wtp_id = self.param_counter
         self.param_id_map[param_name] = new_wtp_id
         self.param_counter += 1
         
-        # Insert new mapping to database if client available
+        # Queue the new mapping; it is inserted with the others in flush_pending_mappings
         if client:
+            self._pending_param_inserts.append((new_wtp_id, param_name))
+            if len(self._pending_param_inserts) >= self.batch_size:
+                self.flush_pending_mappings(client)
+        
+        return new_wtp_id
+    
+    def flush_pending_mappings(self, client):
+        """Insert queued device/parameter mappings with one native block insert per table"""
+        # Each batch is attempted once (like the old per-mapping inserts), not retried on every call
+        device_inserts, self._pending_device_inserts = self._pending_device_inserts, []
+        param_inserts, self._pending_param_inserts = self._pending_param_inserts, []
+        
+        if device_inserts:
             try:
-                # Escape single quotes in parameter name for SQL safety
-                escaped_param_name = param_name.replace("'", "\\'")
-                query = f"INSERT INTO parameter_info (wtp_id, wtp_param_name) VALUES ({new_wtp_id}, '{escaped_param_name}')"
-                client.execute(query)
+                client.execute(
+                    "INSERT INTO device_mapping (wld_id, wld_device_dmc) VALUES",
+                    device_inserts
+                )
+                print(f"   ✅ Inserted {len(device_inserts)} new device mappings")
             except Exception as e:
-                print(f"⚠️ Error inserting parameter mapping to ClickHouse: {e}")
+                print(f"⚠️ Error inserting device mappings to ClickHouse: {e}")
         
-        return new_wtp_id
+        if param_inserts:
+            try:
+                client.execute(
+                    "INSERT INTO parameter_info (wtp_id, wtp_param_name) VALUES",
+                    param_inserts
+                )
+                print(f"   ✅ Inserted {len(param_inserts)} new parameter mappings")
+            except Exception as e:
+                print(f"⚠️ Error inserting parameter mappings to ClickHouse: {e}")
+    
+    def _prefetch_ids(self, client, device_names, param_names):
+        """Load existing IDs for the given names with one batched query per mapping table
+        
+        Fills device_id_map/param_id_map (and bumps the counters past the loaded IDs) and
+        returns the found (device_mapping, param_mapping) dicts.
+        """
+        device_mapping = {}
+        if device_names:
+            try:
+                rows = client.execute(
+                    "SELECT wld_device_dmc, wld_id FROM device_mapping WHERE wld_device_dmc IN %(names)s",
+                    {'names': tuple(device_names)}
+                )
+                for device_name, device_id in rows:
+                    device_mapping[device_name] = device_id
+                    self.device_id_map[device_name] = device_id
+                    # Update counter to avoid conflicts
+                    if device_id >= self.device_counter:
+                        self.device_counter = device_id + 1
+            except Exception as e:
+                print(f"   ⚠️ Error batch loading device mappings: {e}")
+        
+        param_mapping = {}
+        if param_names:
+            try:
+                rows = client.execute(
+                    "SELECT wtp_param_name, wtp_id FROM parameter_info WHERE wtp_param_name IN %(names)s",
+                    {'names': tuple(param_names)}
+                )
+                for param_name, param_id in rows:
+                    param_mapping[param_name] = param_id
+                    self.param_id_map[param_name] = param_id
+                    # Update counter to avoid conflicts
+                    if param_id >= self.param_counter:
+                        self.param_counter = param_id + 1
+            except Exception as e:
+                print(f"   ⚠️ Error batch loading parameter mappings: {e}")
+        
+        return device_mapping, param_mapping
+    
+    def _get_clickhouse_client(self, host, port, database, user, password):
+        """Return a cached clickhouse-driver client, reconnecting only when the target changes"""
+        from clickhouse_driver import Client
+        
+        key = (host, port, database, user, password)
+        if self._ch_client is None or self._ch_client_key != key:
+            if self._ch_client is not None:
+                self._ch_client.disconnect()
+            self._ch_client = Client(
+                host=host,
+                port=port,
+                database=database,
+                user=user,
+                password=password
+            )
+            self._ch_client_key = key
+        return self._ch_client
     
     def _generate_file_hash(self, file_path):
         """Generate MD5 hash of the file for deduplication (like original STDF_Parser_CH.py)"""
-        hash_md5 = hashlib.md5()
+        # Stays MD5: the hash is stored as measurements.file_hash and compared against earlier loads
         try:
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
+                if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                    return hashlib.file_digest(f, 'md5').hexdigest()
+                hash_md5 = hashlib.md5()
+                for chunk in iter(lambda: f.read(1 << 20), b""):
                     hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+                return hash_md5.hexdigest()
         except Exception as e:
             print(f"⚠️ Error generating file hash: {e}")
             return None
@@ -186,8 +264,10 @@ class STDFProcessor:
             return False
         
         try:
-            query = f"SELECT COUNT(*) FROM measurements WHERE file_hash = '{file_hash}' LIMIT 1"
-            rows = client.execute(query)
+            rows = client.execute(
+                "SELECT COUNT(*) FROM measurements WHERE file_hash = %(file_hash)s LIMIT 1",
+                {'file_hash': file_hash}
+            )
             if rows and len(rows) > 0:
                 count = rows[0][0]
                 return count > 0
@@ -199,8 +279,6 @@ class STDFProcessor:
     def _load_existing_mappings_from_clickhouse(self, host='localhost', port=9000, database='default', user='default', password=''):
         """Load existing device and parameter mappings from ClickHouse"""
         try:
-            from clickhouse_driver import Client
-            
             # Use provided parameters or stored settings
             actual_host = host if host != 'localhost' else getattr(self, 'ch_host', 'localhost')
             actual_port = port if port != 9000 else getattr(self, 'ch_port', 9000)
@@ -208,13 +286,9 @@ class STDFProcessor:
             actual_user = user if user != 'default' else getattr(self, 'ch_user', 'default')
             actual_password = password if password != '' else getattr(self, 'ch_password', '')
             
-            # Create connection to load mappings
-            client = Client(
-                host=actual_host,
-                port=actual_port,
-                database=actual_database,
-                user=actual_user,
-                password=actual_password
+            # Reuse the connection opened for the dedup check
+            client = self._get_clickhouse_client(
+                actual_host, actual_port, actual_database, actual_user, actual_password
             )
             
             # Load device mappings
@@ -256,15 +330,10 @@ class STDFProcessor:
             print(f"   📄 File hash: {file_hash}")
             self.current_file_hash = file_hash
             
-            # Create temporary ClickHouse connection to check for duplicates
+            # ClickHouse connection to check for duplicates (kept for the mapping load below)
             try:
-                from clickhouse_driver import Client
-                temp_client = Client(
-                    host=ch_host,
-                    port=ch_port,
-                    database=ch_database,
-                    user=ch_user,
-                    password=ch_password
+                temp_client = self._get_clickhouse_client(
+                    ch_host, ch_port, ch_database, ch_user, ch_password
                 )
                 
                 if self._is_file_already_processed(file_hash, temp_client):
@@ -272,7 +341,7 @@ class STDFProcessor:
                     print(f"⚠️ File {filename} already processed (hash: {file_hash})")
                     print(f"⚠️ Skipping processing to prevent duplicates")
                     # Return empty results to indicate file was skipped
-                    self.measurement_tuples = []
+                    self.measurement_columns = {}
                     self.new_device_mappings = []
                     self.new_param_mappings = []
                     self.processing_stats = {
@@ -280,7 +349,7 @@ class STDFProcessor:
                         'file_hash': file_hash,
                         'total_measurements': 0
                     }
-                    return []
+                    return {}
                 else:
                     print(f"✅ File not previously processed, continuing...")
             except Exception as e:
@@ -301,11 +370,13 @@ class STDFProcessor:
             stdf_file_path, 
             device_mappings, 
             param_mappings,
-            self.current_file_hash or ""  # Pass the MD5 hash from Python
+            self.current_file_hash or "",  # Pass the MD5 hash from Python
+            True  # Columnar output: one list per field, no per-measurement tuples
         )
         
         # Extract results from C++ processing
-        measurement_tuples = result.get('measurement_tuples', [])
+        measurement_columns = result.get('measurement_columns', {})
+        measurement_count = len(measurement_columns.get('wld_id', []))
         new_device_mappings = result.get('new_device_mappings', [])
         new_param_mappings = result.get('new_param_mappings', [])
         
@@ -319,11 +390,11 @@ class STDFProcessor:
         print(f"   ⏱️ Total time: {total_time:.2f}s")
         
         if total_time > 0:
-            throughput = len(measurement_tuples) / total_time
+            throughput = measurement_count / total_time
             print(f"   🚀 Throughput: {throughput:.0f} measurements/second")
         
-        # Store tuples for ClickHouse insertion
-        self.measurement_tuples = measurement_tuples
+        # Store columns for ClickHouse insertion
+        self.measurement_columns = measurement_columns
         
         # Update ID mappings from C++ results (includes both existing + new)
         total_devices = len(device_mappings) + len(new_device_mappings)
@@ -341,7 +412,7 @@ class STDFProcessor:
             'cpp_parsing_time': result.get('parsing_time', 0),
             'cpp_processing_time': result.get('processing_time', 0),
             'total_processing_time': total_time,
-            'total_measurements': len(measurement_tuples),
+            'total_measurements': measurement_count,
             'total_records': result.get('total_records', 0),
             'ultra_fast_mode': True
         }
@@ -349,7 +420,7 @@ class STDFProcessor:
         # For compatibility, also store as measurements list (but empty to save memory)
         self.measurements = []
         
-        return measurement_tuples
+        return measurement_columns
     
     def _extract_from_records(self, record_types):
         """Extract measurements from parsed records using OPTIMIZED CROSS-PRODUCT logic + FIXED ID mapping"""
@@ -398,17 +469,30 @@ class STDFProcessor:
         mir_equipment = mir_info.get('equipment', '')
         file_hash = self.current_file_hash or ""
         
+        # Optional MIR fields are per file: keep only the non-empty ones (avoid dictionary bloat)
+        mir_optional_fields = {
+            key: value for key, value in (
+                ('WFI_FACILITY', mir_facility),
+                ('WFI_OPERATION', mir_operation),
+                ('WL_LOT_NAME', mir_lot_name),
+                ('WFI_EQUIPMENT', mir_equipment),
+            ) if value
+        }
+        
         # 3. CACHE: Pre-process test records with PIXEL TEST FILTERING (avoid repeated field lookups)
         test_cache = []
         param_id_mapping = {}  # 🚀 FIX: Build proper parameter ID mapping
         
         for test in test_records:
-            test_fields = test.get('fields', {})
+            fget = test.get('fields', {}).get
             
             # CRITICAL: Apply pixel test filtering using .def file extractions
             # Use TEST_TXT and ALARM_ID from .def file extractions (more maintainable)
-            param_name = test_fields.get('TEST_TXT', test_fields.get('ALARM_ID', ''))
-            test_txt = test_fields.get('TEST_TXT', test_fields.get('ALARM_ID', ''))
+            # (fallback only when the key is missing - an empty TEST_TXT still wins, as before)
+            test_txt = fget('TEST_TXT')
+            if test_txt is None:
+                test_txt = fget('ALARM_ID', '')
+            param_name = test_txt
             
             # Skip if not a pixel test (same filtering as old code)
             if not self._is_pixel_test(param_name, test_txt):
@@ -421,45 +505,63 @@ class STDFProcessor:
             param_id = self.parameters[cleaned_param_name]
             param_id_mapping[cleaned_param_name] = param_id
             
-            result_string = test_fields.get('RTN_RSLT', test_fields.get('RESULT', ''))
+            result_string = fget('RTN_RSLT')
+            if result_string is None:
+                result_string = fget('RESULT', '')
+            values = None
             if result_string:
                 try:
-                    values = [float(v.strip()) for v in result_string.split(',') if v.strip()]
-                    if values:
-                        self.debug_comma_tests += 1
-                    else:
-                        values = [0.0]
-                        self.debug_single_tests += 1
-                except:
-                    values = [0.0]
-                    self.debug_single_tests += 1
+                    # Whole string in one map(float) pass; blanks/garbage fall back to per-value parsing
+                    values = list(map(float, result_string.split(',')))
+                except ValueError:
+                    try:
+                        values = [float(v.strip()) for v in result_string.split(',') if v.strip()]
+                    except ValueError:
+                        values = None
+
+            if values:
+                self.debug_comma_tests += 1
             else:
                 values = [0.0]
                 self.debug_single_tests += 1
                 
+            # Pixel coordinates depend only on the test; None falls back to the PRR X/Y per device
+            pixel_x, pixel_y = self._extract_test_coordinates(cleaned_param_name, test_txt, None, None)
+            
+            # Optional fields are fixed per test, so merge them once here instead of per value
+            units = fget('UNITS', '')
+            optional_fields = {'UNITS': units, **mir_optional_fields} if units else mir_optional_fields
+            
             test_cache.append((
-                values,
-                self._safe_int(test_fields.get('TEST_NUM', 0)),  # Convert to int
+                tuple(values),  # Iterated once per device: tuple iteration is cheaper than list
+                self._safe_int(fget('TEST_NUM', 0)),  # Convert to int
                 cleaned_param_name,  # 🚀 FIX: Use cleaned parameter name
                 param_id,           # 🚀 FIX: Use proper parameter ID  
-                test_txt,    # test_txt (same as param_name in this case)
-                test_fields.get('UNITS', ''),
-                self._safe_int(test_fields.get('TEST_FLG', 0))   # Extract TEST_FLG for deduplication
+                pixel_x,
+                pixel_y,
+                optional_fields,
+                self._safe_int(fget('TEST_FLG', 0))   # Extract TEST_FLG for deduplication
             ))
         
         print(f"🎯 Cached {len(test_cache):,} pixel tests with proper parameter IDs")
         
         processed_devices = 0
         total_measurements_created = 0
+        append_measurement = self.measurements.append
         
         for prr in prr_records:
-            prr_fields = prr.get('fields', {})
+            fget = prr.get('fields', {}).get
             
             # Extract device data from PRR (following original logic)
-            device_dmc = prr_fields.get('PART_ID', prr_fields.get('PART_TXT', ''))
-            bin_code = prr_fields.get('SOFT_BIN', prr_fields.get('HARD_BIN', ''))
-            default_x_pos = self._safe_int(prr_fields.get('X_COORD', 0))
-            default_y_pos = self._safe_int(prr_fields.get('Y_COORD', 0))
+            device_dmc = fget('PART_ID')
+            if device_dmc is None:
+                device_dmc = fget('PART_TXT', '')
+            bin_code = fget('SOFT_BIN')
+            if bin_code is None:
+                bin_code = fget('HARD_BIN', '')
+            test_flag = 1 if bin_code == '1' else 0  # Fixed per device, not per value
+            default_x_pos = self._safe_int(fget('X_COORD', 0))
+            default_y_pos = self._safe_int(fget('Y_COORD', 0))
             
             # 🚀 FIX: Get consistent device ID using proper mapping (following original logic)
             if device_dmc not in self.devices:
@@ -469,12 +571,11 @@ class STDFProcessor:
             device_measurements_before = len(self.measurements)
             
             # 4. ELIMINATE FUNCTION CALLS: Inline _process_single_test (avoid function calls) - KEEP THIS!
-            for values, test_num, cleaned_param_name, param_id, test_txt, units, test_flg in test_cache:
+            for values, test_num, cleaned_param_name, param_id, test_x, test_y, optional_fields, test_flg in test_cache:
                 
-                # Extract pixel coordinates (inline for speed)
-                pixel_x, pixel_y = self._extract_test_coordinates(
-                    cleaned_param_name, test_txt, default_x_pos, default_y_pos
-                )
+                # Pixel coordinates were parsed once per test above
+                pixel_x = default_x_pos if test_x is None else test_x
+                pixel_y = default_y_pos if test_y is None else test_y
                 
                 # 5. FASTER DATA STRUCTURES: Create measurements directly (inline logic) - KEEP THIS!
                 for value in values:
@@ -487,28 +588,17 @@ class STDFProcessor:
                         'WP_POS_X': pixel_x,
                         'WP_POS_Y': pixel_y,
                         'WPTM_VALUE': value,
-                        'TEST_FLAG': 1 if bin_code == '1' else 0,
+                        'TEST_FLAG': test_flag,
                         'TEST_FLG': test_flg,  # Raw STDF flag for deduplication
                         'TEST_NUM': test_num,
                         'SEGMENT': 0,
                         'FILE_HASH': file_hash,
                         'WLD_DEVICE_DMC': device_dmc,
-                        'WLD_BIN_CODE': bin_code
+                        'WLD_BIN_CODE': bin_code,
+                        **optional_fields  # Non-empty UNITS/MIR fields, precomputed per test
                     }
                     
-                    # Add optional fields only if non-empty (avoid dictionary bloat)
-                    if units:
-                        measurement['UNITS'] = units
-                    if mir_facility:
-                        measurement['WFI_FACILITY'] = mir_facility
-                    if mir_operation:
-                        measurement['WFI_OPERATION'] = mir_operation
-                    if mir_lot_name:
-                        measurement['WL_LOT_NAME'] = mir_lot_name
-                    if mir_equipment:
-                        measurement['WFI_EQUIPMENT'] = mir_equipment
-                    
-                    self.measurements.append(measurement)
+                    append_measurement(measurement)
             
             device_measurements_created = len(self.measurements) - device_measurements_before
             total_measurements_created += device_measurements_created
@@ -555,8 +645,7 @@ class STDFProcessor:
         if not text or 'Pixel=' not in text:
             return None, None
         
-        import re
-        match = re.search(r'Pixel=R(\d+)C(\d+)', text)
+        match = _PIXEL_RE.search(text)
         if match:
             row = int(match.group(1))  # R = Row = Y
             col = int(match.group(2))  # C = Column = X  
@@ -569,10 +658,7 @@ class STDFProcessor:
         if not param_name:
             return param_name
         
-        import re
-        cleaned = re.sub(r';Pixel=R\d+C\d+', '', param_name)
-        cleaned = re.sub(r'^Pixel=R\d+C\d+;', '', cleaned)
-        return cleaned
+        return _strip_pixel_from_param(param_name)
     
     def _parse_test_values(self, test_txt):
         """Parse test values (from original)"""
@@ -631,8 +717,8 @@ class STDFProcessor:
             print("⚠️ ClickHouse integration is disabled")
             return False
         
-        # Check for measurements in either format (tuples or list)
-        has_measurements = (hasattr(self, 'measurement_tuples') and self.measurement_tuples) or \
+        # Check for measurements in either format (columns or list)
+        has_measurements = (hasattr(self, 'measurement_columns') and self.measurement_columns) or \
                           (hasattr(self, 'measurements') and self.measurements)
         
         if not has_measurements:
@@ -641,45 +727,41 @@ class STDFProcessor:
         
         print(f"\n🚀 Starting ClickHouse integration (clickhouse-driver - native TCP)...")
         clickhouse_start = time.time()
+        client = None
         
         try:
-            # Check if we have ultra-fast tuples or need to process old format
-            if hasattr(self, 'measurement_tuples') and self.measurement_tuples:
-                print(f"🚀 Using ULTRA-FAST C++ tuples (no transformation needed)...")
+            # Check if we have ultra-fast columns or need to process old format
+            if hasattr(self, 'measurement_columns') and self.measurement_columns:
+                print(f"🚀 Using ULTRA-FAST C++ columns (no transformation needed)...")
                 transform_time = 0.0  # No transformation needed!
                 
-                # Convert tuples to ClickHouse format with datetime
+                # Select the ClickHouse columns, adding the datetime column
                 from datetime import datetime
                 current_time = datetime.now()
                 
-                # Ultra-fast tuple conversion (already optimized in C++)
-                clickhouse_tuples = []
-                for tuple_data in self.measurement_tuples:
-                    # 🚀 MACRO-DRIVEN: Unpack all fields automatically
-                    # C++ macros ensure this matches the field count exactly
-                    (wld_id, wtp_id, wp_pos_x, wp_pos_y, wptm_value, test_flag, segment, file_hash,
-                     wld_device_dmc, wtp_param_name, units, test_num, test_flg) = tuple_data
-                    
-                    clickhouse_tuples.append((
-                        wld_id,
-                        wtp_id, 
-                        wp_pos_x,
-                        wp_pos_y,
-                        wptm_value,
-                        current_time,  # ClickHouse datetime
-                        test_flag,
-                        segment,
-                        file_hash
-                    ))
+                # 🚀 MACRO-DRIVEN: column names come from measurement_fields.def
+                columns = self.measurement_columns
+                row_count = len(columns['wld_id'])
+                clickhouse_columns = [
+                    columns['wld_id'],
+                    columns['wtp_id'],
+                    columns['wp_pos_x'],
+                    columns['wp_pos_y'],
+                    columns['wptm_value'],
+                    [current_time] * row_count,  # ClickHouse datetime
+                    columns['test_flag'],
+                    columns['segment'],
+                    columns['file_hash']
+                ]
                 
                 # Create ultra-fast data store
                 data_store = {
-                    'measurement_tuples': clickhouse_tuples,
+                    'measurement_columns': clickhouse_columns,
                     'measurements': [],  # Empty to save memory
                     'landing_records': []
                 }
                 
-                print(f"✅ Ultra-fast tuple conversion: {len(clickhouse_tuples):,} tuples ready for ClickHouse")
+                print(f"✅ Ultra-fast column selection: {row_count:,} rows ready for ClickHouse")
                 
             else:
                 # Fallback to old format processing
@@ -690,43 +772,35 @@ class STDFProcessor:
                 from datetime import datetime
                 current_time = datetime.now()
                 
-                # Fix measurements with proper DateTime objects and add segment field
-                fixed_measurements = []
+                # Fix measurements in place (nothing else holds them) with proper DateTime objects and segment field
                 duplicate_tracker = {}  # Track duplicates like STDF_Parser_CH.py
                 
                 for measurement in self.measurements:
-                    fixed_measurement = measurement.copy()
-                    
                     # Convert string timestamps to datetime objects for ClickHouse
-                    if 'WPTM_CREATED_DATE' in fixed_measurement:
-                        fixed_measurement['WPTM_CREATED_DATE'] = current_time
-                    if 'WLD_CREATED_DATE' in fixed_measurement:
-                        fixed_measurement['WLD_CREATED_DATE'] = current_time
+                    if 'WPTM_CREATED_DATE' in measurement:
+                        measurement['WPTM_CREATED_DATE'] = current_time
+                    if 'WLD_CREATED_DATE' in measurement:
+                        measurement['WLD_CREATED_DATE'] = current_time
                     
                     # Add segment field for deduplication (like STDF_Parser_CH.py)
                     # Create duplicate key based on device + parameter + coordinates + test_flag (like clickhouse_utils.py line 768)
+                    # Coordinates are already ints here, so the key stays all-int (no str() per row)
                     duplicate_key = (
-                        fixed_measurement.get('WLD_ID', 0),
-                        fixed_measurement.get('WTP_ID', 0), 
-                        str(fixed_measurement.get('WP_POS_X', 0)),  # Convert to string like original
-                        str(fixed_measurement.get('WP_POS_Y', 0)),  # Convert to string like original
-                        fixed_measurement.get('TEST_FLG', 0)        # Add TEST_FLG (raw STDF flag) for deduplication
+                        measurement.get('WLD_ID', 0),
+                        measurement.get('WTP_ID', 0), 
+                        measurement.get('WP_POS_X', 0),
+                        measurement.get('WP_POS_Y', 0),
+                        measurement.get('TEST_FLG', 0)        # Add TEST_FLG (raw STDF flag) for deduplication
                     )
                     
                     # Get segment number (0 for first occurrence, increment for duplicates)
-                    if duplicate_key in duplicate_tracker:
-                        segment = duplicate_tracker[duplicate_key] + 1
-                        duplicate_tracker[duplicate_key] = segment
-                    else:
-                        segment = 0
-                        duplicate_tracker[duplicate_key] = 0
-                    
-                    fixed_measurement['segment'] = segment
-                    fixed_measurements.append(fixed_measurement)
+                    segment = duplicate_tracker.get(duplicate_key, -1) + 1
+                    duplicate_tracker[duplicate_key] = segment
+                    measurement['segment'] = segment
                 
                 # Create a simple data store using fixed C++ measurements
                 data_store = {
-                    'measurements': fixed_measurements,
+                    'measurements': self.measurements,
                     'landing_records': []  # Empty for now
                 }
             
@@ -765,58 +839,21 @@ class STDFProcessor:
                     
                     print(f"   🎯 Found {len(unique_devices)} unique devices, {len(unique_params)} unique parameters")
                     
-                    # 🚀 FIX 2: Batch lookup devices from database
-                    device_mapping = {}
-                    if unique_devices:
-                        try:
-                            # Single query to get all existing device mappings
-                            device_list = "', '".join(unique_devices)
-                            query = f"SELECT wld_device_dmc, wld_id FROM device_mapping WHERE wld_device_dmc IN ('{device_list}')"
-                            rows = client.execute(query)
-                            
-                            for device_name, device_id in rows:
-                                device_mapping[device_name] = device_id
-                                self.processor.device_id_map[device_name] = device_id
-                                # Update counter to avoid conflicts
-                                if device_id >= self.processor.device_counter:
-                                    self.processor.device_counter = device_id + 1
-                            
-                            print(f"   📊 Loaded {len(device_mapping)} existing device mappings from database")
-                        except Exception as e:
-                            print(f"   ⚠️ Error batch loading device mappings: {e}")
-                    
-                    # 🚀 FIX 3: Batch lookup parameters from database  
-                    param_mapping = {}
-                    if unique_params:
-                        try:
-                            # Single query to get all existing parameter mappings
-                            escaped_params = [param.replace("'", "\\'") for param in unique_params]
-                            param_list = "', '".join(escaped_params)
-                            query = f"SELECT wtp_param_name, wtp_id FROM parameter_info WHERE wtp_param_name IN ('{param_list}')"
-                            rows = client.execute(query)
-                            
-                            for param_name, param_id in rows:
-                                param_mapping[param_name] = param_id
-                                self.processor.param_id_map[param_name] = param_id
-                                # Update counter to avoid conflicts
-                                if param_id >= self.processor.param_counter:
-                                    self.processor.param_counter = param_id + 1
-                            
-                            print(f"   📊 Loaded {len(param_mapping)} existing parameter mappings from database")
-                        except Exception as e:
-                            print(f"   ⚠️ Error batch loading parameter mappings: {e}")
+                    # 🚀 FIX 2+3: Batch lookup devices and parameters from database
+                    device_mapping, param_mapping = self.processor._prefetch_ids(
+                        client, unique_devices, unique_params
+                    )
+                    print(f"   📊 Loaded {len(device_mapping)} existing device mappings from database")
+                    print(f"   📊 Loaded {len(param_mapping)} existing parameter mappings from database")
                     
                     # 🚀 FIX 4: Create new mappings for items not found in database
-                    new_devices = []
-                    new_params = []
-                    
                     for device_name in unique_devices:
                         if device_name not in device_mapping:
                             new_id = self.processor.device_counter
                             device_mapping[device_name] = new_id
                             self.processor.device_id_map[device_name] = new_id
                             self.processor.device_counter += 1
-                            new_devices.append((new_id, device_name))
+                            self.processor._pending_device_inserts.append((new_id, device_name))
                     
                     for param_name in unique_params:
                         if param_name not in param_mapping:
@@ -824,28 +861,10 @@ class STDFProcessor:
                             param_mapping[param_name] = new_id
                             self.processor.param_id_map[param_name] = new_id
                             self.processor.param_counter += 1
-                            new_params.append((new_id, param_name))
+                            self.processor._pending_param_inserts.append((new_id, param_name))
                     
                     # 🚀 FIX 5: Batch insert new mappings
-                    if new_devices:
-                        try:
-                            client.execute(
-                                "INSERT INTO device_mapping (wld_id, wld_device_dmc) VALUES",
-                                new_devices
-                            )
-                            print(f"   ✅ Inserted {len(new_devices)} new device mappings")
-                        except Exception as e:
-                            print(f"   ⚠️ Error inserting device mappings: {e}")
-                    
-                    if new_params:
-                        try:
-                            client.execute(
-                                "INSERT INTO parameter_info (wtp_id, wtp_param_name) VALUES", 
-                                new_params
-                            )
-                            print(f"   ✅ Inserted {len(new_params)} new parameter mappings")
-                        except Exception as e:
-                            print(f"   ⚠️ Error inserting parameter mappings: {e}")
+                    self.processor.flush_pending_mappings(client)
                     
                     # 🚀 FIX 6: Update measurements using cached mappings (NO database queries!)
                     processed = 0
@@ -876,7 +895,7 @@ class STDFProcessor:
                     self.param_id_map = self.processor.param_id_map
                             
             # Use appropriate measurements based on processing mode
-            measurements_ref = data_store.get('measurement_tuples', data_store.get('measurements', []))
+            measurements_ref = data_store.get('measurement_columns', data_store.get('measurements', []))
             extractor_like = SimpleExtractorLike(data_store, measurements_ref, self)
             
             # Step 2: Setup ClickHouse connection and schema
@@ -911,10 +930,10 @@ class STDFProcessor:
             print(f"📊 Pushing data to ClickHouse...")
             push_start = time.time()
             
-            # Use ultra-fast direct push if we have tuples
-            if hasattr(self, 'measurement_tuples') and self.measurement_tuples:
-                success = self._push_tuples_to_clickhouse_ultra_fast(
-                    data_store['measurement_tuples'],
+            # Use ultra-fast direct push if we have columns
+            if hasattr(self, 'measurement_columns') and self.measurement_columns:
+                success = self._push_columns_to_clickhouse_ultra_fast(
+                    data_store['measurement_columns'],
                     host=host,
                     port=port,
                     database=database,
@@ -960,13 +979,18 @@ class STDFProcessor:
             import traceback
             traceback.print_exc()
             return False
+        finally:
+            # Persist any mappings still queued by get_device_id/get_param_id
+            if client is not None:
+                self.flush_pending_mappings(client)
     
-    def _push_tuples_to_clickhouse_ultra_fast(self, tuples, host, port, database, user, password):
-        """🚀 ULTRA-FAST: Push pre-processed tuples directly to ClickHouse"""
+    def _push_columns_to_clickhouse_ultra_fast(self, columns, host, port, database, user, password):
+        """🚀 ULTRA-FAST: Push pre-processed columns directly to ClickHouse"""
         try:
             from clickhouse_driver import Client
             
-            print(f"🚀 Ultra-fast ClickHouse push: {len(tuples):,} tuples")
+            row_count = len(columns[0])
+            print(f"🚀 Ultra-fast ClickHouse push: {row_count:,} rows")
             start_time = time.time()
             
             # Create optimized connection
@@ -1010,20 +1034,22 @@ class STDFProcessor:
                 print(f"ℹ️ No new parameter mappings to insert")
             
             # Ultra-fast single insert for all measurements
-            print(f"🚀 Inserting {len(tuples):,} measurements in single operation...")
+            print(f"🚀 Inserting {row_count:,} measurements in single operation...")
             insert_start = time.time()
             
+            # Columnar clickhouse-driver insert
             client.execute(
                 "INSERT INTO measurements (wld_id, wtp_id, wp_pos_x, wp_pos_y, wptm_value, wptm_created_date, test_flag, segment, file_hash) VALUES",
-                tuples
+                columns,
+                columnar=True
             )
             
             insert_time = time.time() - insert_start
             total_time = time.time() - start_time
-            throughput = len(tuples) / total_time if total_time > 0 else 0
+            throughput = row_count / total_time if total_time > 0 else 0
             
             print(f"✅ ULTRA-FAST ClickHouse push completed!")
-            print(f"   📊 Measurements pushed: {len(tuples):,}")
+            print(f"   📊 Measurements pushed: {row_count:,}")
             print(f"   ⏱️ Insert time: {insert_time:.2f}s")
             print(f"   ⏱️ Total time: {total_time:.2f}s") 
             print(f"   🚀 Throughput: {throughput:.0f} measurements/second")
@@ -1137,7 +1163,7 @@ def main():
             )
             
             # Extract measurements with ClickHouse connection parameters
-            measurements = processor.extract_measurements(
+            measurement_columns = processor.extract_measurements(
                 stdf_file,
                 ch_host=args.ch_host,
                 ch_port=args.ch_port,
@@ -1153,7 +1179,7 @@ def main():
                 successful_files += 1  # Count as successful since it was handled properly
                 continue
             
-            overall_measurements += len(measurements)
+            overall_measurements += processor.processing_stats.get('total_measurements', 0)
             
             # Push to ClickHouse if requested
             if args.push_clickhouse:
@@ -103,8 +103,10 @@ class SharedIDManager:
             # If ClickHouse client exists, check if mapping exists in database
             if client:
                 try:
-                    query = f"SELECT wld_id FROM device_mapping WHERE wld_device_dmc = '{device_dmc}'"
-                    result = client.execute(query)
+                    result = client.execute(
+                        "SELECT wld_id FROM device_mapping WHERE wld_device_dmc = %(dmc)s",
+                        {'dmc': device_dmc}
+                    )
                     if result:
                         existing_id = result[0][0]
                         self.device_id_map[device_dmc] = existing_id
@@ -126,8 +128,10 @@ class SharedIDManager:
             
             if client:
                 try:
-                    query = f"SELECT wtp_id FROM parameter_info WHERE wtp_param_name = '{param_name}'"
-                    result = client.execute(query)
+                    result = client.execute(
+                        "SELECT wtp_id FROM parameter_info WHERE wtp_param_name = %(name)s",
+                        {'name': param_name}
+                    )
                     if result:
                         existing_id = result[0][0]
                         self.param_id_map[param_name] = existing_id
@@ -207,8 +211,10 @@ class STDFProcessor:
             
             if client:
                 try:
-                    query = f"SELECT wld_id FROM device_mapping WHERE wld_device_dmc = '{device_dmc}'"
-                    result = client.execute(query)
+                    result = client.execute(
+                        "SELECT wld_id FROM device_mapping WHERE wld_device_dmc = %(dmc)s",
+                        {'dmc': device_dmc}
+                    )
                     if result:
                         existing_id = result[0][0]
                         self.device_id_map[device_dmc] = existing_id
@@ -232,8 +238,10 @@ class STDFProcessor:
             
             if client:
                 try:
-                    query = f"SELECT wtp_id FROM parameter_info WHERE wtp_param_name = '{param_name}'"
-                    result = client.execute(query)
+                    result = client.execute(
+                        "SELECT wtp_id FROM parameter_info WHERE wtp_param_name = %(name)s",
+                        {'name': param_name}
+                    )
                     if result:
                         existing_id = result[0][0]
                         self.param_id_map[param_name] = existing_id
@@ -289,12 +297,15 @@ class STDFProcessor:
 
     def _generate_file_hash(self, file_path):
         """Generate MD5 hash of the file for deduplication - EXACT same as single file version"""
-        hash_md5 = hashlib.md5()
+        # Stays MD5: the hash is stored as measurements.file_hash and compared against earlier loads
         try:
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
+                if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                    return hashlib.file_digest(f, 'md5').hexdigest()
+                hash_md5 = hashlib.md5()
+                for chunk in iter(lambda: f.read(1 << 20), b""):
                     hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+                return hash_md5.hexdigest()
         except Exception as e:
             print(f"⚠️ Error generating file hash: {e}")
             return None
@@ -305,8 +316,10 @@ class STDFProcessor:
             return False
         
         try:
-            query = f"SELECT COUNT(*) FROM measurements WHERE file_hash = '{file_hash}' LIMIT 1"
-            rows = client.execute(query)
+            rows = client.execute(
+                "SELECT COUNT(*) FROM measurements WHERE file_hash = %(file_hash)s LIMIT 1",
+                {'file_hash': file_hash}
+            )
             if rows and len(rows) > 0:
                 count = rows[0][0]
                 return count > 0
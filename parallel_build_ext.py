@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Parallel build_ext shared by setup.py and setup_windows_mingw.py
+"""
+
+from setuptools.command.build_ext import build_ext
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+
+def _build_jobs():
+    """Number of parallel compile jobs (cgroup/affinity-aware where the OS supports it)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _parallel_compile(self, sources, output_dir=None, macros=None, include_dirs=None,
+                      debug=0, extra_preargs=None, extra_postargs=None, depends=None):
+    """Drop-in replacement for CCompiler.compile that builds each source concurrently"""
+    macros, objects, extra_postargs, pp_opts, build = self._setup_compile(
+        output_dir, macros, include_dirs, sources, depends, extra_postargs)
+    cc_args = self._get_cc_args(pp_opts, debug, extra_preargs)
+
+    def _compile_one(obj):
+        try:
+            src, ext = build[obj]
+        except KeyError:
+            return  # Up to date, nothing to do
+        self._compile(obj, src, ext, cc_args, extra_postargs, pp_opts)
+
+    # Each source is an independent compiler process (gcc/g++/gcc.exe), so threads are enough
+    with ThreadPoolExecutor(max_workers=_build_jobs()) as executor:
+        list(executor.map(_compile_one, objects))
+
+    return objects
+
+
+class ParallelBuildExt(build_ext):
+    """build_ext that compiles the extension's C++ sources in parallel"""
+
+    def build_extensions(self):
+        self.compiler.compile = _parallel_compile.__get__(self.compiler)
+        super().build_extensions()
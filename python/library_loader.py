@@ -4,9 +4,11 @@ Cross-platform library loader for STDF parser C++ extension
 import os
 import sys
 import platform
+from functools import lru_cache
 
+@lru_cache(maxsize=1)
 def setup_library_path():
-    """Setup library paths for cross-platform compatibility"""
+    """Setup library paths for cross-platform compatibility (runs once; later calls return the cached lib_dir)"""
     
     # Get the directory containing this file
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -47,8 +49,13 @@ def setup_library_path():
                     dll_name = os.path.basename(dll)
                     target = os.path.join(current_dir, dll_name)
                     if not os.path.exists(target):
-                        shutil.copy2(dll, target)
-                        print(f"📦 Copied DLL: {dll_name}")
+                        # Hardlink when on the same volume (no bytes copied), otherwise fall back to a copy
+                        try:
+                            os.link(dll, target)
+                            print(f"📦 Linked DLL: {dll_name}")
+                        except OSError:
+                            shutil.copy2(dll, target)
+                            print(f"📦 Copied DLL: {dll_name}")
                         dll_loaded = True
             except Exception as e:
                 print(f"⚠️  DLL copy failed: {e}")
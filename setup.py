@@ -5,6 +5,15 @@ import os
 import sys
 import sysconfig
 
+# Shared parallel build_ext lives next to the setup scripts
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from parallel_build_ext import ParallelBuildExt
+
+
+# Host-tuned code by default; set STDF_GENERIC_BUILD=1 for binaries that must run on other CPUs
+tuning_args = [] if os.environ.get('STDF_GENERIC_BUILD') else ['-march=native']
+
+
 # Define the extension module
 stdf_parser_extension = Extension(
     'stdf_parser_cpp',
@@ -32,12 +41,16 @@ stdf_parser_extension = Extension(
     extra_compile_args=[
         '-std=c++17',  # Updated for X-Macros
         '-O3',  # Optimization
+        '-flto',  # Link-time optimization across the extension's translation units
+        '-DNDEBUG',
         '-Wall',
         '-Wextra',
-    ],
+    ] + tuning_args,
     extra_link_args=[
         '-std=c++17',
-    ],
+        '-O3',
+        '-flto',
+    ] + tuning_args,
 )
 
 setup(
@@ -55,12 +68,13 @@ setup(
     
     # C++ extension
     ext_modules=[stdf_parser_extension],
+    cmdclass={'build_ext': ParallelBuildExt},
     
     # Requirements
     python_requires='>=3.7',
     install_requires=[
         'numpy>=1.19.0',
-        'clickhouse-driver>=0.2.0',
+        'clickhouse-driver>=0.2.4',
         'fastapi>=0.68.0',
         'uvicorn>=0.15.0',
         'python-multipart>=0.0.5',
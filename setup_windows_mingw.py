@@ -9,8 +9,16 @@ import os
 import sys
 import platform
 
+# Shared parallel build_ext lives next to the setup scripts
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from parallel_build_ext import ParallelBuildExt
+
+
 print("🔧 Setting up STDF Parser for Windows with MinGW...")
 
+# Host-tuned code by default; set STDF_GENERIC_BUILD=1 for binaries that must run on other CPUs
+tuning_args = [] if os.environ.get('STDF_GENERIC_BUILD') else ['-march=native']
+
 # Force MinGW compiler on Windows
 if platform.system() == "Windows":
     print("🪟 Windows detected - forcing MinGW compiler...")
@@ -38,10 +46,13 @@ if platform.system() == "Windows":
         'extra_compile_args': [
             '-std=c++17',  # Updated for X-Macros
             '-O3',
+            '-flto',
             '-DWIN32',
             '-DNDEBUG',
-        ],
+        ] + tuning_args,
         'extra_link_args': [
+            '-O3',
+            '-flto',
             '-static-libgcc',
             '-static-libstdc++',
             '-static',  # Static link EVERYTHING including MSVC runtime
@@ -62,6 +73,7 @@ setup(
     version='1.0.0',
     description='Native Windows STDF parser using MinGW',
     ext_modules=[stdf_extension],
+    cmdclass={'build_ext': ParallelBuildExt},
     zip_safe=False,
 )
 
@@ -5,6 +5,35 @@ Performance Comparison: Updated C++ vs Python STDF Parsers
 import os
 import sys
 import time
+import subprocess
+import threading
+from collections import Counter
+
+def _run_streaming(cmd, timeout=None, cwd=None):
+    """Run cmd (in cwd) and echo its combined stdout/stderr line by line as it arrives"""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=cwd,
+                            text=True, encoding='utf-8', errors='replace', bufsize=1)
+    timed_out = threading.Event()
+    
+    def _kill():
+        timed_out.set()
+        proc.kill()
+    
+    timer = threading.Timer(timeout, _kill) if timeout else None
+    if timer:
+        timer.start()
+    try:
+        for line in proc.stdout:
+            print(line, end='')
+        returncode = proc.wait()
+    finally:
+        if timer:
+            timer.cancel()
+        proc.stdout.close()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return returncode
 
 def test_cpp_parser():
     """Test the fixed C++ parser"""
@@ -42,13 +71,10 @@ def test_cpp_parser():
             print(f"  Records per second: {parsed_records/cpp_time:,.0f}")
             
             # Count record types
-            record_types = {}
-            for record in records:
-                rec_type = record.get('record_type', 'UNKNOWN')
-                record_types[rec_type] = record_types.get(rec_type, 0) + 1
+            record_types = Counter(record.get('record_type', 'UNKNOWN') for record in records)
             
             print(f"\n📈 Record Type Breakdown:")
-            for rec_type in sorted(record_types.keys(), key=lambda x: record_types[x], reverse=True):
+            for rec_type in sorted(record_types, key=record_types.get, reverse=True):
                 count = record_types[rec_type]
                 if count > 0:
                     print(f"  {rec_type}: {count:,} records")
@@ -72,13 +98,10 @@ def run_python_comparison(cpp_results):
     print(f"\n🐍 Running Python Fair Comparison Test...")
     print("=" * 50)
     
-    # Change to Python parser directory
-    python_dir = "../STDFReader_Extreme_AW_Simple"
+    # Python parser directory (the child process runs there; our cwd is left alone)
+    python_dir = os.path.abspath("../STDFReader_Extreme_AW_Simple")
     if os.path.exists(python_dir):
-        original_dir = os.getcwd()
         try:
-            os.chdir(python_dir)
-            import subprocess
             import json
             import tempfile
             
@@ -94,22 +117,20 @@ def run_python_comparison(cpp_results):
                 json.dump(cpp_data, f)
                 cpp_results_file = f.name
             
-            # Pass C++ results file as argument
-            result = subprocess.run([sys.executable, "test_fair_comparison.py", "--cpp-results", cpp_results_file], 
-                                  capture_output=True, text=True, encoding='utf-8', 
-                                  errors='replace', timeout=120)
-            
-            # Clean up temp file
-            os.unlink(cpp_results_file)
+            # Pass C++ results file as argument (output is streamed, not buffered in memory)
+            print("📄 Python Results:")
+            try:
+                returncode = _run_streaming([sys.executable, "test_fair_comparison.py", "--cpp-results", cpp_results_file],
+                                            timeout=120, cwd=python_dir)
+            finally:
+                # Clean up temp file
+                os.unlink(cpp_results_file)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 print("✅ Python comparison completed!")
-                print("📄 Python Results:")
-                print(result.stdout)
                 return True
             else:
-                print("❌ Python comparison failed!")
-                print("Error:", result.stderr)
+                print(f"❌ Python comparison failed! (exit code {returncode})")
                 return False
                 
         except subprocess.TimeoutExpired:
@@ -118,8 +139,6 @@ def run_python_comparison(cpp_results):
         except Exception as e:
             print(f"❌ Error running Python test: {e}")
             return False
-        finally:
-            os.chdir(original_dir)
     else:
         print(f"❌ Python directory not found: {python_dir}")
         return False
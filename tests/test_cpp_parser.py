@@ -8,6 +8,8 @@ import os
 import sys
 import tempfile
 import json
+import glob
+from collections import Counter
 
 # Add python directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python'))
@@ -19,6 +21,13 @@ try:
 except ImportError:
     CPP_EXTENSION_AVAILABLE = False
 
+STDF_FILES_DIR = os.path.join(os.path.dirname(__file__), '..', 'STDF_Files')
+
+def _sample_stdf_file():
+    """Smallest real STDF file bundled in STDF_Files/, or None"""
+    stdf_files = glob.glob(os.path.join(STDF_FILES_DIR, '*.stdf'))
+    return min(stdf_files, key=os.path.getsize) if stdf_files else None
+
 class TestSTDFCppParser:
     """Test cases for STDF C++ Parser"""
     
@@ -85,7 +94,62 @@ class TestSTDFCppParser:
                 
         finally:
             os.unlink(tmp_path)
-            
+
+    def test_columnar_matches_records(self):
+        """Test columnar parsing returns the same records as parse_stdf_file"""
+        if not CPP_EXTENSION_AVAILABLE:
+            pytest.skip("C++ extension not built yet")
+        stdf_file = _sample_stdf_file()
+        if stdf_file is None:
+            pytest.skip("No STDF file in STDF_Files/")
+
+        records = stdf_parser_cpp.parse_stdf_file(stdf_file)['records']
+        columns = stdf_parser_cpp.parse_stdf_file_columnar(stdf_file)
+
+        assert len(records) > 0
+        assert columns['record_type'] == [record['record_type'] for record in records]
+        for name, column in columns['fields'].items():
+            assert column == [record['fields'].get(name) for record in records]
+
+    def test_count_record_types_matches_records(self):
+        """Test count_record_types tallies the same record types as parse_stdf_file"""
+        if not CPP_EXTENSION_AVAILABLE:
+            pytest.skip("C++ extension not built yet")
+        stdf_file = _sample_stdf_file()
+        if stdf_file is None:
+            pytest.skip("No STDF file in STDF_Files/")
+
+        parsed = stdf_parser_cpp.parse_stdf_file(stdf_file)
+        counted = stdf_parser_cpp.count_record_types(stdf_file)
+
+        assert len(parsed['records']) > 0
+        assert counted['record_types'] == Counter(record['record_type'] for record in parsed['records'])
+        assert counted['total_records'] == parsed['total_records']
+        assert counted['parsed_records'] == parsed['parsed_records']
+
+    def test_database_mappings_columnar_matches_tuples(self):
+        """Test columnar process_stdf_with_database_mappings returns the tuple output field by field"""
+        if not CPP_EXTENSION_AVAILABLE:
+            pytest.skip("C++ extension not built yet")
+        stdf_file = _sample_stdf_file()
+        if stdf_file is None:
+            pytest.skip("No STDF file in STDF_Files/")
+
+        # Field order of cpp/include/measurement_fields.def
+        names = ['wld_id', 'wtp_id', 'wp_pos_x', 'wp_pos_y', 'wptm_value', 'test_flag', 'segment',
+                 'file_hash', 'wld_device_dmc', 'wtp_param_name', 'units', 'test_num', 'test_flg']
+
+        rows = stdf_parser_cpp.process_stdf_with_database_mappings(stdf_file, [], [], 'test_hash', False)
+        cols = stdf_parser_cpp.process_stdf_with_database_mappings(stdf_file, [], [], 'test_hash', True)
+
+        measurement_tuples = rows['measurement_tuples']
+        columns = cols['measurement_columns']
+        assert len(measurement_tuples) > 0
+        assert sorted(columns) == sorted(names)
+        assert list(zip(*(columns[n] for n in names))) == measurement_tuples
+        assert cols['new_device_mappings'] == rows['new_device_mappings']
+        assert cols['new_param_mappings'] == rows['new_param_mappings']
+
     def test_record_conversion(self):
         """Test conversion to ClickHouse format"""
         parser = STDFCppParser()